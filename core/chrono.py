@@ -1,6 +1,8 @@
 # core/chrono.py
 from PySide6.QtCore import QObject, QElapsedTimer, QTimer, Signal
 
+from typecore import tracing
+
 class RealtimeTimer(QObject):
     elapsedChanged = Signal(float)  # seconds (active-time only)
     started = Signal()
@@ -19,8 +21,9 @@ class RealtimeTimer(QObject):
         self._tick.setInterval(tick_ms)
         self._tick.timeout.connect(self._on_tick)
 
-    def start(self):
-        self._elapsed = 0.0
+    def start(self, elapsed: float = 0.0):
+        """Start counting; `elapsed` carries over time from a restored session."""
+        self._elapsed = float(elapsed)
         self._paused = False
         self._running = True
         self._t.start()
@@ -54,4 +57,6 @@ class RealtimeTimer(QObject):
         return self._elapsed
 
     def _on_tick(self):
-        self.elapsedChanged.emit(self.seconds())
+        secs = self.seconds()
+        tracing.event(tracing.TIMER_TICK, int(secs * 1000))
+        self.elapsedChanged.emit(secs)
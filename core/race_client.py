@@ -0,0 +1,104 @@
+# core/race_client.py
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtNetwork import QAbstractSocket, QTcpSocket
+
+from services import race_protocol as rp
+
+
+class RaceClient(QObject):
+    """
+    Qt side of a LAN race (see services/race_server.py).
+
+    report() only records the latest caret / WPM; a timer sends it at most
+    once per `send_ms`, so typing bursts never turn into bursts of frames.
+    """
+    joined = Signal(int)                 # our player id
+    passage = Signal(int, float, str)    # race id, countdown seconds, text
+    opponents = Signal(object)           # {player_id: (flags, caret, wpm)}
+    disconnected = Signal(str)
+
+    def __init__(self, parent=None, send_ms: int = 50):
+        super().__init__(parent)
+        self.player_id = None
+        self.race_id = 0
+        self._players = {}
+        self._frames = rp.FrameBuffer()
+        self._latest = None
+        self._sent = None
+        self._name = "guest"
+
+        self._sock = QTcpSocket(self)
+        self._sock.connected.connect(self._on_connected)
+        self._sock.readyRead.connect(self._on_ready_read)
+        # also fires when the server closes the connection
+        self._sock.errorOccurred.connect(self._on_error)
+
+        self._send_tick = QTimer(self)
+        self._send_tick.setInterval(send_ms)
+        self._send_tick.timeout.connect(self._flush)
+
+    def connect_to(self, host: str, port: int, name: str = "guest"):
+        self._name = name
+        self._sock.connectToHost(host, port)
+        self._send_tick.start()
+
+    def is_connected(self) -> bool:
+        return self._sock.state() == QAbstractSocket.ConnectedState
+
+    def close(self):
+        self._send_tick.stop()
+        self._sock.abort()
+
+    # ---- outgoing ----
+    def report(self, caret: int, wpm: float):
+        self._latest = (int(caret), float(wpm))
+
+    def _flush(self):
+        if self._latest is None or self._latest == self._sent or not self.is_connected():
+            return
+        self._sock.write(rp.progress(*self._latest))
+        self._sent = self._latest
+
+    def send_finish(self, caret: int, wpm: float, accuracy: float):
+        if self.is_connected():
+            self._sock.write(rp.finish(int(caret), float(wpm), float(accuracy)))
+            self._latest = self._sent = (int(caret), float(wpm))
+
+    def _on_connected(self):
+        self._sock.write(rp.hello(self._name))
+
+    # ---- incoming ----
+    def _on_ready_read(self):
+        try:
+            frames = self._frames.feed(bytes(self._sock.readAll()))
+        except ValueError as e:
+            self.close()
+            self.disconnected.emit(str(e))
+            return
+        changed = False
+        for kind, payload in frames:
+            if kind == rp.TICK:
+                _seq, full, entries = rp.decode_tick(payload)
+                if full:
+                    self._players = {}
+                for pid, flags, caret, wpm in entries:
+                    if flags & rp.FLAG_LEFT:
+                        self._players.pop(pid, None)
+                    else:
+                        self._players[pid] = (flags, caret, wpm)
+                changed = True
+            elif kind == rp.PASSAGE:
+                self.race_id, countdown, text = rp.decode_passage(payload)
+                self._players = {pid: (0, 0, 0.0) for pid in self._players}
+                self._latest = self._sent = None
+                self.passage.emit(self.race_id, countdown, text)
+                changed = True
+            elif kind == rp.WELCOME:
+                self.player_id = rp.decode_welcome(payload)
+                self.joined.emit(self.player_id)
+        if changed:
+            # only the final state of a batch of ticks is worth repainting
+            self.opponents.emit({pid: st for pid, st in self._players.items() if pid != self.player_id})
+
+    def _on_error(self, _err):
+        self.disconnected.emit(self._sock.errorString())
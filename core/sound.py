@@ -0,0 +1,162 @@
+# core/sound.py
+"""
+Keystroke sound engine.
+
+Every effect is loaded once, and each gets a small pool of QSoundEffect
+players sharing the decoded sample. Players live on their own thread: the
+key handler only emits a queued signal, and the audio thread starts the
+next idle player in the pool, so overlapping keys never wait on one
+another or on the audio backend.
+
+The trigger-to-play delay of recent keys is sampled on the audio thread;
+its median and p99 are logged when the engine shuts down.
+"""
+from __future__ import annotations
+from collections import deque
+from time import perf_counter
+from typing import Dict, List
+import logging
+import threading
+
+from PySide6.QtCore import QCoreApplication, QObject, QThread, QUrl, Signal, Slot
+
+from utils.sfx import EFFECTS, KEY_SOUNDS, ensure_effects
+
+try:
+    from PySide6.QtMultimedia import QSoundEffect
+except ImportError:  # QtMultimedia needs the platform audio libraries
+    QSoundEffect = None
+
+VOICES = 4           # players per effect; a key sound is far shorter than 4 keys at 200 WPM
+LATENCY_SAMPLES = 512
+LATENCY_TARGET_MS = 10.0
+
+
+class _Players(QObject):
+    """Owns the QSoundEffect pools; lives on the audio thread."""
+
+    def __init__(self, paths: Dict[str, str], voices: int, volume: float):
+        super().__init__()
+        self._paths = paths
+        self._voices = voices
+        self._volume = volume
+        self._pools: List[List] = []
+        self._next: List[int] = []
+        # trigger -> play() delay in ms, read by SoundEngine.latency_ms()
+        # from the GUI thread, hence the lock
+        self.latency = deque(maxlen=LATENCY_SAMPLES)
+        self.latency_lock = threading.Lock()
+
+    @Slot()
+    def load(self):
+        for name in EFFECTS:
+            url = QUrl.fromLocalFile(self._paths[name])
+            pool = []
+            for _ in range(self._voices):
+                fx = QSoundEffect(self)
+                fx.setSource(url)
+                fx.setVolume(self._volume)
+                pool.append(fx)
+            self._pools.append(pool)
+            self._next.append(0)
+
+    @Slot(int, float)
+    def play(self, effect: int, triggered_at: float):
+        pool = self._pools[effect]
+        start = self._next[effect]
+        # round robin, skipping players still sounding; steal the oldest if all are
+        for k in range(len(pool)):
+            i = (start + k) % len(pool)
+            if not pool[i].isPlaying():
+                break
+        else:
+            i = start
+        self._next[effect] = (i + 1) % len(pool)
+        pool[i].play()
+        with self.latency_lock:
+            self.latency.append((perf_counter() - triggered_at) * 1000.0)
+
+    @Slot(float)
+    def set_volume(self, volume: float):
+        self._volume = volume
+        for pool in self._pools:
+            for fx in pool:
+                fx.setVolume(volume)
+
+
+class SoundEngine(QObject):
+    """
+    GUI-side handle. key() and finish() cost one queued signal emit;
+    nothing is played while disabled.
+    """
+    _trigger = Signal(int, float)
+    _volume = Signal(float)
+
+    def __init__(self, parent=None, key_sound: str = "key_click", volume: float = 0.6, voices: int = VOICES):
+        super().__init__(parent)
+        self.available = QSoundEffect is not None
+        self.enabled = False
+        self._index = {name: i for i, name in enumerate(EFFECTS)}
+        self._key = self._index[key_sound]
+        self._thread = None
+        self._players = None
+        if not self.available:
+            return
+        paths = {name: str(p.resolve()) for name, p in ensure_effects().items()}
+        self._thread = QThread(self)
+        self._thread.setObjectName("sound")
+        self._players = _Players(paths, voices, volume)
+        self._players.moveToThread(self._thread)
+        self._thread.started.connect(self._players.load)
+        self._thread.finished.connect(self._players.deleteLater)
+        # different threads: both connections are queued
+        self._trigger.connect(self._players.play)
+        self._volume.connect(self._players.set_volume)
+        self._thread.start()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    # ---- settings ----
+    def set_enabled(self, enabled: bool):
+        self.enabled = bool(enabled) and self.available
+
+    def set_key_sound(self, name: str):
+        if name in KEY_SOUNDS:
+            self._key = self._index[name]
+
+    def set_volume(self, volume: float):
+        self._volume.emit(max(0.0, min(1.0, float(volume))))
+
+    # ---- triggers (key path) ----
+    def key(self, correct: bool = True):
+        if self.enabled:
+            self._trigger.emit(self._key if correct else self._index["err"], perf_counter())
+
+    def finish(self):
+        if self.enabled:
+            self._trigger.emit(self._index["ok"], perf_counter())
+
+    # ---- diagnostics / teardown ----
+    def latency_ms(self) -> List[float]:
+        """Recent trigger-to-play delays in milliseconds."""
+        if self._players is None:
+            return []
+        with self._players.latency_lock:
+            return list(self._players.latency)
+
+    def shutdown(self):
+        if self._thread is not None and self._thread.isRunning():
+            self._thread.quit()
+            self._thread.wait(2000)
+            self._log_latency()
+
+    def _log_latency(self):
+        samples = sorted(self.latency_ms())
+        if not samples:
+            return
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        log = logging.info if p99 <= LATENCY_TARGET_MS else logging.warning
+        log("Key sound latency over the last %d keys: p50 %.1f ms, p99 %.1f ms (target %.0f ms)",
+            len(samples), p50, p99, LATENCY_TARGET_MS)
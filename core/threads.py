@@ -1,6 +1,11 @@
 # core/threads.py
+import threading
+
 from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 
+from typecore.lexer import lex
+from utils.export import ExportCancelled, export_rows
+
 class TextLoadWorkerSignals(QObject):
     loaded = Signal(str)
     failed = Signal(str)
@@ -19,5 +24,59 @@ class TextLoadWorker(QRunnable):
         except Exception as e:
             self.signals.failed.emit(str(e))
 
+class ExportWorkerSignals(QObject):
+    progress = Signal(int)      # rows written so far
+    done = Signal(int, str)     # total rows, output path
+    cancelled = Signal()
+    failed = Signal(str)
+
+class ExportWorker(QRunnable):
+    """
+    Streams rows into a CSV / JSONL(.gz) file off the GUI thread.
+    `make_rows` is called on the worker thread, so it may open its own
+    SQLite connection or map trace files there.
+    """
+    def __init__(self, make_rows, header, path: str):
+        super().__init__()
+        self.make_rows = make_rows
+        self.header = header
+        self.path = path
+        self.signals = ExportWorkerSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            n = export_rows(
+                self.make_rows(), self.header, self.path,
+                progress=self.signals.progress.emit,
+                cancelled=self._cancel.is_set,
+            )
+            self.signals.done.emit(n, self.path)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+class LexWorkerSignals(QObject):
+    done = Signal(object, object)   # content key, typecore.lexer.Tokens
+    failed = Signal(str)
+
+class LexWorker(QRunnable):
+    """Tokenizes a code text for syntax colouring; the result lands in the lexer cache."""
+    def __init__(self, text: str, key: bytes):
+        super().__init__()
+        self.text = text
+        self.key = key
+        self.signals = LexWorkerSignals()
+
+    def run(self):
+        try:
+            self.signals.done.emit(self.key, lex(self.text, self.key))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
 class Workers:
     pool = QThreadPool.globalInstance()
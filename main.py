@@ -1,7 +1,10 @@
 # main.py
 from __future__ import annotations
 import sys
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from PySide6.QtWidgets import QApplication, QMessageBox
@@ -9,20 +12,43 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon   # <-- already imported, needed for logo
 
 from ui.main_window import MainWindow
+from typecore import tracing
+
+
+# log records are written by this listener's thread, never the GUI thread
+_log_listener: QueueListener | None = None
+
+# trace events written next to the traceback of an unhandled exception
+CRASH_TRACE_EVENTS = 200
 
 
 def setup_logging() -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("app.log", encoding="utf-8"),
-        ],
-    )
+    global _log_listener
+    formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler("app.log", encoding="utf-8"),
+    ]
+    for h in handlers:
+        h.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    # the caller only merges args (and any traceback) into the message;
+    # timestamps, layout and I/O happen on the listener thread
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
 
     def excepthook(exctype, value, tb):
-        logging.exception("Unhandled exception", exc_info=(exctype, value, tb))
+        events = tracing.dump(CRASH_TRACE_EVENTS)
+        logging.critical(
+            "Unhandled exception\nLast %d trace events (ms before the newest):\n%s",
+            len(events), "\n".join(events) or "  (tracing disabled)",
+            exc_info=(exctype, value, tb),
+        )
+        flush_logging()
         try:
             QMessageBox.critical(None, "Application Error", f"{exctype.__name__}: {value}")
         except Exception:
@@ -32,6 +58,13 @@ def setup_logging() -> None:
     sys.excepthook = excepthook
 
 
+def flush_logging() -> None:
+    """Block until every queued record is written (the listener is restarted)."""
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener.start()
+
+
 def load_stylesheet(app: QApplication) -> None:
     qss = Path("resources/style.qss")
     if qss.exists():
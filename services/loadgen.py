@@ -0,0 +1,379 @@
+# services/loadgen.py
+"""
+Headless load generator for the race server and the results database.
+
+Simulated typists drive a TypingEngine with Gaussian inter-key intervals
+and configurable error / backspace rates. They run as asyncio tasks spread
+over worker processes, and the report gives throughput and latency
+percentiles for the backend under test. Everything runs locally; the race
+server can be spawned on a free localhost port.
+
+  python -m services.loadgen race --clients 2000 --procs 4 --duration 30
+  python -m services.loadgen race --connect 10.0.0.5:8765 --clients 200
+  python -m services.loadgen db --writers 8 --sessions 4000
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from services import race_protocol as rp
+from typecore.engine import TypingEngine
+
+BACKSPACE = "<BACKSPACE>"
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+@dataclass(frozen=True)
+class TypistProfile:
+    wpm: float = 60.0            # mean speed of the population
+    wpm_spread: float = 15.0     # sd of per-typist speed
+    jitter: float = 0.35         # sd of an interval, as a fraction of its mean
+    error_rate: float = 0.04     # chance a keystroke is wrong
+    backspace_rate: float = 0.8  # chance an error gets corrected right away
+
+
+class SimTypist:
+    """One simulated typist working through `text` on a TypingEngine."""
+
+    def __init__(self, text: str, profile: TypistProfile, rng: random.Random):
+        self.engine = TypingEngine(text)
+        self.profile = profile
+        self.rng = rng
+        wpm = max(10.0, rng.gauss(profile.wpm, profile.wpm_spread))
+        # 5 chars per word
+        self.mean_interval = 60.0 / (wpm * 5.0)
+
+    def _interval(self) -> float:
+        m = self.mean_interval
+        return max(0.02, self.rng.gauss(m, m * self.profile.jitter))
+
+    def strokes(self) -> Iterator[Tuple[float, str]]:
+        """Yield (seconds to wait, key) and apply each key to the engine."""
+        e, rng, p = self.engine, self.rng, self.profile
+        while len(e.typed) < len(e.target):
+            want = e.target[len(e.typed)]
+            if rng.random() < p.error_rate:
+                key = rng.choice(_LETTERS.replace(want, "") or "x")
+                yield self._interval(), key
+                e.process_key(key)
+                if rng.random() < p.backspace_rate:
+                    yield self._interval() * 1.5, BACKSPACE
+                    e.backspace()
+                continue
+            yield self._interval(), want
+            e.process_key(want)
+
+
+@dataclass
+class LoadReport:
+    name: str
+    ops: int
+    seconds: float
+    latencies_ms: np.ndarray
+    extra: str = ""
+
+    def summary(self) -> str:
+        lat = self.latencies_ms
+        rate = self.ops / self.seconds if self.seconds > 0 else 0.0
+        lines = [f"{self.name}: {self.ops} ops in {self.seconds:.1f} s = {rate:,.0f} ops/s"]
+        if len(lat):
+            p50, p90, p99, p999 = np.percentile(lat, [50, 90, 99, 99.9])
+            lines.append(
+                f"  latency ms  p50 {p50:.2f}  p90 {p90:.2f}  p99 {p99:.2f}"
+                f"  p99.9 {p999:.2f}  max {lat.max():.2f}  (n={len(lat)})"
+            )
+        if self.extra:
+            lines.append("  " + self.extra)
+        return "\n".join(lines)
+
+
+def _raise_fd_limit():
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _split(total: int, parts: int) -> List[int]:
+    parts = max(1, min(parts, total))
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+# ---------------- race server ----------------
+class _RaceStats:
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.latencies: List[float] = []
+        self.errors = 0
+
+
+async def _race_typist(host, port, profile, rng, stop_at, st: _RaceStats, send_s: float):
+    loop = asyncio.get_running_loop()
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        st.errors += 1
+        return
+    writer.write(rp.hello(f"sim{rng.randrange(1 << 30)}"))
+    frames = rp.FrameBuffer()
+    me = None
+    passages: asyncio.Queue = asyncio.Queue()
+    pending = {}   # caret -> send time, for progress not yet echoed by a tick
+
+    async def read_loop():
+        nonlocal me
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            now = loop.time()
+            for kind, payload in frames.feed(data):
+                st.received += 1
+                if kind == rp.TICK:
+                    for pid, _flags, caret, _wpm in rp.decode_tick(payload)[2]:
+                        if pid == me and caret in pending:
+                            st.latencies.append((now - pending[caret]) * 1000.0)
+                            for c in [c for c in pending if c <= caret]:
+                                del pending[c]
+                elif kind == rp.WELCOME:
+                    me = rp.decode_welcome(payload)
+                elif kind == rp.PASSAGE:
+                    passages.put_nowait(rp.decode_passage(payload))
+
+    reading = asyncio.create_task(read_loop())
+    try:
+        while loop.time() < stop_at:
+            try:
+                _race_id, countdown, text = await asyncio.wait_for(passages.get(), stop_at - loop.time())
+            except asyncio.TimeoutError:
+                break
+            await asyncio.sleep(countdown)
+            typist = SimTypist(text, profile, rng)
+            started = loop.time()
+            last_send = 0.0
+            for wait, _key in typist.strokes():
+                await asyncio.sleep(wait)
+                now = loop.time()
+                if now >= stop_at or not passages.empty():
+                    break
+                # coalesce like the GUI client: at most one progress per send_s
+                if now - last_send >= send_s:
+                    caret = len(typist.engine.typed)
+                    writer.write(rp.progress(caret, typist.engine.wpm(now - started)))
+                    pending[caret] = now
+                    last_send = now
+                    st.sent += 1
+            else:
+                e = typist.engine
+                writer.write(rp.finish(len(e.typed), e.wpm(loop.time() - started), e.accuracy() * 100.0))
+                st.sent += 1
+    except (ConnectionError, OSError):
+        st.errors += 1
+    finally:
+        reading.cancel()
+        writer.close()
+
+
+async def _race_clients(host, port, n, profile, duration, seed, send_s, ramp_s):
+    loop = asyncio.get_running_loop()
+    st = _RaceStats()
+    stop_at = loop.time() + duration
+    tasks = []
+    for i in range(n):
+        rng = random.Random(seed * 1_000_003 + i)
+        tasks.append(asyncio.create_task(_race_typist(host, port, profile, rng, stop_at, st, send_s)))
+        if ramp_s:
+            await asyncio.sleep(ramp_s / n)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return st
+
+
+def _race_worker(host, port, n, profile, duration, seed, send_s, ramp_s):
+    """Process entry point; returns plain data so it pickles cheaply."""
+    _raise_fd_limit()
+    st = asyncio.run(_race_clients(host, port, n, profile, duration, seed, send_s, ramp_s))
+    return st.sent, st.received, st.errors, np.asarray(st.latencies, dtype=np.float32)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn_race_server(port: int, tick_hz: float) -> subprocess.Popen:
+    root = Path(__file__).resolve().parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "services.race_server", "--host", "127.0.0.1",
+         "--port", str(port), "--min-players", "1", "--tick-hz", str(tick_hz)],
+        cwd=root, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("race server did not start")
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    """utime + stime of a process (Linux /proc only)."""
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def run_race(host=None, port=None, clients=500, procs=1, duration=20.0,
+             profile=TypistProfile(), tick_hz=20.0, send_ms=50, ramp_s=2.0, seed=1) -> LoadReport:
+    """Load a race server (spawned locally unless host/port are given)."""
+    server = None
+    if host is None:
+        host, port = "127.0.0.1", _free_port()
+        server = _spawn_race_server(port, tick_hz)
+    cpu0 = _cpu_seconds(server.pid) if server else None
+    t0 = time.perf_counter()
+    try:
+        counts = _split(clients, procs)
+        with ProcessPoolExecutor(len(counts)) as pool:
+            futures = [
+                pool.submit(_race_worker, host, port, n, profile, duration, seed + i, send_ms / 1000.0, ramp_s)
+                for i, n in enumerate(counts)
+            ]
+            results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - t0
+        cpu1 = _cpu_seconds(server.pid) if server else None
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(5)
+
+    sent = sum(r[0] for r in results)
+    received = sum(r[1] for r in results)
+    errors = sum(r[2] for r in results)
+    lat = np.concatenate([r[3] for r in results]) if results else np.empty(0)
+    extra = f"{clients} clients in {len(counts)} procs; {received:,} frames received; {errors} connection errors"
+    if cpu0 is not None and cpu1 is not None:
+        extra += f"; server CPU {100.0 * (cpu1 - cpu0) / elapsed:.0f}% of one core"
+    return LoadReport("race progress -> tick echo", sent, elapsed, lat, extra)
+
+
+# ---------------- results database ----------------
+def _simulate_session(text: str, profile: TypistProfile, rng: random.Random):
+    """Type a passage in virtual time; returns (wpm, accuracy %, seconds, weak keys)."""
+    typist = SimTypist(text, profile, rng)
+    seconds = 0.0
+    weak = {}
+    for wait, key in typist.strokes():
+        seconds += wait
+        if key != BACKSPACE:
+            want = typist.engine.target[len(typist.engine.typed)]
+            slot = weak.setdefault(want, {"hit": 0, "miss": 0})
+            slot["hit" if key == want else "miss"] += 1
+    e = typist.engine
+    return e.wpm(seconds), e.accuracy() * 100.0, seconds, weak
+
+
+def _db_worker(db_path: str, sessions: int, profile: TypistProfile, seed: int):
+    from typecore.corpus import passage as corpus_passage
+    from typecore import storage
+
+    storage.DB_PATH = db_path
+    rng = random.Random(seed)
+    user_id = storage.upsert_user(f"sim{seed}")
+    lat = np.empty(sessions, dtype=np.float32)
+    texts = [corpus_passage()[:300] for _ in range(8)]
+    for i in range(sessions):
+        wpm, acc, secs, weak = _simulate_session(rng.choice(texts), profile, rng)
+        t = time.perf_counter()
+        storage.insert_result(user_id, wpm, acc, secs, json.dumps(weak))
+        lat[i] = (time.perf_counter() - t) * 1000.0
+    return lat
+
+
+def run_db(db_path=None, writers=4, sessions=2000, profile=TypistProfile(), seed=1) -> LoadReport:
+    """Concurrent writers inserting finished sessions (a temp DB unless db_path is given)."""
+    tmp = None
+    if db_path is None:
+        tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp.name, "loadgen.db")
+    try:
+        counts = _split(sessions, writers)
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(len(counts)) as pool:
+            lat = np.concatenate(list(pool.map(
+                _db_worker, [db_path] * len(counts), counts, [profile] * len(counts),
+                [seed + i for i in range(len(counts))],
+            )))
+        elapsed = time.perf_counter() - t0
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+    return LoadReport("results insert", len(lat), elapsed, lat, f"{len(counts)} writer processes")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Typemaster synthetic load generator")
+    sub = ap.add_subparsers(dest="target", required=True)
+
+    def typist_args(p):
+        p.add_argument("--wpm", type=float, default=60.0)
+        p.add_argument("--wpm-spread", type=float, default=15.0)
+        p.add_argument("--jitter", type=float, default=0.35)
+        p.add_argument("--error-rate", type=float, default=0.04)
+        p.add_argument("--backspace-rate", type=float, default=0.8)
+        p.add_argument("--seed", type=int, default=1)
+
+    race = sub.add_parser("race", help="load the LAN race server")
+    race.add_argument("--connect", help="host:port of a running server (default: spawn one)")
+    race.add_argument("--clients", type=int, default=500)
+    race.add_argument("--procs", type=int, default=os.cpu_count() or 1)
+    race.add_argument("--duration", type=float, default=20.0)
+    race.add_argument("--tick-hz", type=float, default=20.0)
+    race.add_argument("--send-ms", type=int, default=50)
+    race.add_argument("--ramp", type=float, default=2.0, help="seconds to connect all clients")
+    typist_args(race)
+
+    db = sub.add_parser("db", help="load the results database")
+    db.add_argument("--db", help="database file (default: a temporary one)")
+    db.add_argument("--writers", type=int, default=4)
+    db.add_argument("--sessions", type=int, default=2000)
+    typist_args(db)
+
+    args = ap.parse_args(argv)
+    profile = TypistProfile(args.wpm, args.wpm_spread, args.jitter, args.error_rate, args.backspace_rate)
+    if args.target == "race":
+        host = port = None
+        if args.connect:
+            host, _, p = args.connect.rpartition(":")
+            host, port = host or "127.0.0.1", int(p)
+        report = run_race(host, port, args.clients, args.procs, args.duration, profile,
+                          args.tick_hz, args.send_ms, args.ramp, args.seed)
+    else:
+        report = run_db(args.db, args.writers, args.sessions, profile, args.seed)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
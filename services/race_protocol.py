@@ -0,0 +1,134 @@
+# services/race_protocol.py
+"""
+Wire format for LAN races.
+
+Every frame is a little-endian u32 length (of what follows) and a u8 frame
+type, then the payload:
+
+  client -> server
+    HELLO     name:utf-8
+    PROGRESS  caret:u32 wpm:f32
+    FINISH    caret:u32 wpm:f32 accuracy:f32
+
+  server -> client
+    WELCOME   player_id:u16
+    PASSAGE   race_id:u32 countdown:f32 text:utf-8
+    TICK      seq:u32 full:u8 n:u16, then n x (player_id:u16 flags:u8 caret:u32 wpm:f32)
+
+A TICK carries only the players whose state changed since the previous
+tick, unless `full` is set (sent to clients that need a resync).
+"""
+from __future__ import annotations
+from typing import Iterable, List, Tuple
+import struct
+
+HELLO = 1
+PROGRESS = 2
+FINISH = 3
+WELCOME = 16
+PASSAGE = 17
+TICK = 18
+
+# player flags in TICK entries
+FLAG_FINISHED = 1
+FLAG_LEFT = 2
+
+# frames larger than this are a protocol error (passages are well below it)
+MAX_FRAME = 1 << 20
+
+_PREFIX = struct.Struct("<IB")
+PREFIX_SIZE = _PREFIX.size
+_PROGRESS = struct.Struct("<If")
+_FINISH = struct.Struct("<Iff")
+_WELCOME = struct.Struct("<H")
+_PASSAGE = struct.Struct("<If")
+_TICK_HEAD = struct.Struct("<IBH")
+_ENTRY = struct.Struct("<HBIf")
+
+PlayerState = Tuple[int, int, int, float]   # (player_id, flags, caret, wpm)
+
+
+def frame(kind: int, payload: bytes = b"") -> bytes:
+    return _PREFIX.pack(len(payload) + 1, kind) + payload
+
+
+def hello(name: str) -> bytes:
+    return frame(HELLO, name.encode("utf-8")[:64])
+
+
+def progress(caret: int, wpm: float) -> bytes:
+    return frame(PROGRESS, _PROGRESS.pack(caret, wpm))
+
+
+def finish(caret: int, wpm: float, accuracy: float) -> bytes:
+    return frame(FINISH, _FINISH.pack(caret, wpm, accuracy))
+
+
+def welcome(player_id: int) -> bytes:
+    return frame(WELCOME, _WELCOME.pack(player_id))
+
+
+def passage(race_id: int, countdown: float, text: str) -> bytes:
+    return frame(PASSAGE, _PASSAGE.pack(race_id, countdown) + text.encode("utf-8"))
+
+
+def tick(seq: int, entries: Iterable[PlayerState], full: bool = False) -> bytes:
+    entries = list(entries)
+    body = b"".join(_ENTRY.pack(*e) for e in entries)
+    return frame(TICK, _TICK_HEAD.pack(seq, 1 if full else 0, len(entries)) + body)
+
+
+# ---- decoding ----
+def decode_prefix(head: bytes) -> Tuple[int, int]:
+    """(payload length, kind) from the first PREFIX_SIZE bytes of a frame."""
+    length, kind = _PREFIX.unpack_from(head)
+    if length < 1 or length > MAX_FRAME:
+        raise ValueError(f"bad frame length {length}")
+    return length - 1, kind
+
+
+def decode_progress(payload: bytes) -> Tuple[int, float]:
+    return _PROGRESS.unpack_from(payload)
+
+
+def decode_finish(payload: bytes) -> Tuple[int, float, float]:
+    return _FINISH.unpack_from(payload)
+
+
+def decode_welcome(payload: bytes) -> int:
+    return _WELCOME.unpack_from(payload)[0]
+
+
+def decode_passage(payload: bytes) -> Tuple[int, float, str]:
+    race_id, countdown = _PASSAGE.unpack_from(payload)
+    return race_id, countdown, payload[_PASSAGE.size:].decode("utf-8", errors="replace")
+
+
+def decode_tick(payload: bytes) -> Tuple[int, bool, List[PlayerState]]:
+    seq, full, n = _TICK_HEAD.unpack_from(payload)
+    off = _TICK_HEAD.size
+    entries = [e for e in _ENTRY.iter_unpack(payload[off:off + n * _ENTRY.size])]
+    return seq, bool(full), entries
+
+
+class FrameBuffer:
+    """Reassembles frames from a byte stream (used by non-asyncio clients)."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """Append received bytes and return every complete (kind, payload)."""
+        self._buf += data
+        buf = self._buf
+        out = []
+        off = 0
+        while len(buf) - off >= PREFIX_SIZE:
+            size, kind = decode_prefix(buf[off:off + PREFIX_SIZE])
+            end = off + PREFIX_SIZE + size
+            if end > len(buf):
+                break
+            out.append((kind, bytes(buf[off + PREFIX_SIZE:end])))
+            off = end
+        del buf[:off]
+        return out
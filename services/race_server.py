@@ -0,0 +1,249 @@
+# services/race_server.py
+"""
+Asyncio race server for head-to-head typing on a LAN.
+
+Everyone connected races the same passage. Clients report their caret and
+WPM whenever they like; the server only records the latest value and, on
+a fixed tick, broadcasts one frame holding every player that changed since
+the previous tick. That frame is encoded once and written to all clients.
+
+Sends never wait on a client: when a client's transport buffer is over
+`max_buffer` bytes the frame is dropped for that client and it gets a
+full-state tick once it catches up, so one slow kiosk cannot stall the
+loop or grow memory.
+
+Run standalone with:  python -m services.race_server --port 8765
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import argparse
+import asyncio
+
+from services import race_protocol as rp
+from typecore.corpus import passage as corpus_passage
+
+
+@dataclass
+class _Player:
+    pid: int
+    name: str
+    writer: asyncio.StreamWriter
+    caret: int = 0
+    wpm: float = 0.0
+    flags: int = 0
+    resync: bool = True
+    dropped: int = 0
+    race_id: int = 0        # last race whose passage reached the send buffer
+
+    def state(self) -> rp.PlayerState:
+        return (self.pid, self.flags, self.caret, self.wpm)
+
+
+@dataclass
+class RaceStats:
+    ticks: int = 0
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    progress_in: int = 0
+    races: int = 0
+    connected: int = 0
+
+
+class RaceServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        tick_hz: float = 20.0,
+        min_players: int = 2,
+        countdown: float = 3.0,
+        max_buffer: int = 64 * 1024,
+        passage_source: Callable[[], str] = corpus_passage,
+    ):
+        self.host = host
+        self.port = port
+        self.tick = 1.0 / tick_hz
+        self.min_players = min_players
+        self.countdown = countdown
+        self.max_buffer = max_buffer
+        self.passage_source = passage_source
+        self.players: Dict[int, _Player] = {}
+        self.stats = RaceStats()
+        self.race_id = 0
+        self.text = ""
+        self._dirty: Dict[int, rp.PlayerState] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        # port 0 picks a free port (tests); report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.create_task(self._tick_loop())
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for p in list(self.players.values()):
+            p.writer.close()
+        self.players.clear()
+
+    # ---- races ----
+    def start_race(self, text: Optional[str] = None):
+        self.race_id += 1
+        self.stats.races += 1
+        self.text = text if text is not None else self.passage_source()
+        self._dirty.clear()
+        frame = rp.passage(self.race_id, self.countdown, self.text)
+        for p in self.players.values():
+            p.caret, p.wpm, p.flags = 0, 0.0, 0
+            p.resync = True
+            if self._send(p, frame):
+                p.race_id = self.race_id
+
+    def _race_over(self) -> bool:
+        return bool(self.players) and all(p.flags & rp.FLAG_FINISHED for p in self.players.values())
+
+    def _maybe_start(self):
+        if len(self.players) < self.min_players:
+            return
+        if not self.text or self._race_over():
+            self.start_race()
+
+    # ---- sending ----
+    def _send(self, p: _Player, frame: bytes) -> bool:
+        transport = p.writer.transport
+        if transport.is_closing():
+            return False
+        if transport.get_write_buffer_size() > self.max_buffer:
+            p.dropped += 1
+            p.resync = True
+            self.stats.frames_dropped += 1
+            return False
+        p.writer.write(frame)
+        self.stats.frames_sent += 1
+        return True
+
+    async def _tick_loop(self):
+        loop = asyncio.get_running_loop()
+        seq = 0
+        next_at = loop.time()
+        while True:
+            next_at += self.tick
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            seq += 1
+            self.stats.ticks += 1
+            if not self.players:
+                self._dirty.clear()
+                continue
+            delta = rp.tick(seq, self._dirty.values()) if self._dirty else None
+            full = None
+            for p in self.players.values():
+                if p.resync:
+                    if p.race_id != self.race_id and self.text:
+                        # the passage itself was dropped; resend it first
+                        if not self._send(p, rp.passage(self.race_id, 0.0, self.text)):
+                            continue
+                        p.race_id = self.race_id
+                    if full is None:
+                        full = rp.tick(seq, (q.state() for q in self.players.values()), full=True)
+                    if self._send(p, full):
+                        p.resync = False
+                elif delta is not None:
+                    self._send(p, delta)
+            self._dirty.clear()
+            if self._race_over():
+                self._maybe_start()
+
+    # ---- per connection ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        p: Optional[_Player] = None
+        try:
+            while True:
+                size, kind = rp.decode_prefix(await reader.readexactly(rp.PREFIX_SIZE))
+                payload = await reader.readexactly(size) if size else b""
+                if p is None:
+                    if kind != rp.HELLO:
+                        break
+                    p = self._join(payload.decode("utf-8", errors="replace"), writer)
+                    if p is None:
+                        break
+                    continue
+                if kind == rp.PROGRESS:
+                    p.caret, p.wpm = rp.decode_progress(payload)
+                    self.stats.progress_in += 1
+                elif kind == rp.FINISH:
+                    p.caret, p.wpm, _acc = rp.decode_finish(payload)
+                    p.flags |= rp.FLAG_FINISHED
+                else:
+                    continue
+                self._dirty[p.pid] = p.state()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if p is not None:
+                self._leave(p)
+            writer.close()
+
+    def _free_pid(self) -> Optional[int]:
+        """
+        Lowest id (u16, from 1) not held by a player. Ids still queued in
+        _dirty count as held, so a leave reaches clients before its id is
+        handed out again.
+        """
+        pid = 1
+        while pid in self.players or pid in self._dirty:
+            pid += 1
+        return pid if pid <= 0xFFFF else None
+
+    def _join(self, name: str, writer: asyncio.StreamWriter) -> Optional[_Player]:
+        pid = self._free_pid()
+        if pid is None:
+            return None         # every id is taken; the connection is closed
+        p = _Player(pid, name, writer)
+        self.players[p.pid] = p
+        self.stats.connected = len(self.players)
+        self._send(p, rp.welcome(p.pid))
+        if self.text:
+            # late joiner: race the current passage from the start
+            if self._send(p, rp.passage(self.race_id, 0.0, self.text)):
+                p.race_id = self.race_id
+        self._maybe_start()
+        return p
+
+    def _leave(self, p: _Player):
+        self.players.pop(p.pid, None)
+        self.stats.connected = len(self.players)
+        p.flags |= rp.FLAG_LEFT
+        self._dirty[p.pid] = p.state()
+        if not self.players:
+            self.text = ""
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Typemaster LAN race server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--tick-hz", type=float, default=20.0)
+    ap.add_argument("--min-players", type=int, default=2)
+    args = ap.parse_args(argv)
+    server = RaceServer(args.host, args.port, args.tick_hz, args.min_players)
+    print(f"Race server on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# services/rescore.py
+"""
+Re-score stored sessions after a change to the WPM / accuracy formulas.
+
+Every result with a keystroke trace and a score_version older than
+typecore.scoring.SCORE_VERSION is replayed from its trace and updated in
+place. Workers get (id, trace path) chunks and map the traces themselves,
+so no keystroke data is pickled between processes; the parent only writes
+the returned metrics, one transaction per batch. Each batch stamps the new
+score_version, so an interrupted run simply resumes where it stopped.
+
+  python -m services.rescore
+  python -m services.rescore --workers 8 --db data/users.db --traces data/traces
+"""
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import List, Tuple
+import argparse
+import os
+import sys
+import time
+
+from typecore import storage
+from typecore.errors import TraceError
+from typecore.scoring import SCORE_VERSION, score_trace
+from typecore.trace import TRACE_DIR, TRACE_SUFFIX, TraceReader, read_header
+
+Score = Tuple[int, float, float, float]   # (result id, wpm, accuracy %, duration)
+
+
+def _score_chunk(items: List[Tuple[int, str]]) -> Tuple[List[Score], int]:
+    """Worker: score a chunk of (id, trace path); returns (scores, unreadable count)."""
+    out, failed = [], 0
+    for rid, path in items:
+        try:
+            with TraceReader(path) as reader:
+                out.append((rid, *score_trace(reader)))
+        except (OSError, TraceError):
+            failed += 1
+    return out, failed
+
+
+def _read_headers(paths: List[str]) -> List[Tuple[str, float, float]]:
+    """Worker: (path, duration, wpm) of each readable trace."""
+    out = []
+    for p in paths:
+        try:
+            h = read_header(p)
+        except (OSError, TraceError):
+            continue
+        out.append((p, h.duration, h.wpm))
+    return out
+
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rescore(workers: int | None = None, chunk: int = 256, batch: int = 5000,
+            link_dir: Path | None = TRACE_DIR, version: int = SCORE_VERSION, log=print) -> dict:
+    """
+    Re-score every stale result. Returns counts: linked, scored, failed,
+    seconds. Safe to interrupt; already committed batches are kept.
+    """
+    workers = workers or os.cpu_count() or 1
+    conn = storage.get_conn()
+    stats = {"linked": 0, "scored": 0, "failed": 0, "seconds": 0.0}
+    t0 = time.perf_counter()
+    ex = ProcessPoolExecutor(workers)
+    pending: List[Score] = []
+    try:
+        if link_dir is not None and storage.has_unlinked_results(conn):
+            paths = [str(p) for p in Path(link_dir).glob(f"*{TRACE_SUFFIX}")]
+            headers = (h for part in ex.map(_read_headers, _chunks(paths, 1024)) for h in part)
+            stats["linked"] = storage.link_traces(conn, headers)
+        total = storage.count_stale_scores(conn, version)
+        log(f"{total:,} sessions to re-score with {workers} workers"
+            + (f" ({stats['linked']:,} newly linked to traces)" if stats["linked"] else ""))
+        if not total:
+            return stats
+
+        todo = _chunks(storage.iter_stale_scores(conn, version), chunk)
+        running = set()
+        # keep a few chunks queued per worker; the rest stay in the parent
+        for _ in range(workers * 4):
+            items = next(todo, None)
+            if items is None:
+                break
+            running.add(ex.submit(_score_chunk, items))
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                scores, failed = fut.result()
+                pending.extend(scores)
+                stats["failed"] += failed
+                items = next(todo, None)
+                if items is not None:
+                    running.add(ex.submit(_score_chunk, items))
+            if len(pending) >= batch:
+                storage.apply_scores(conn, pending, version)
+                stats["scored"] += len(pending)
+                pending = []
+                log(f"  {stats['scored']:,} / {total:,}")
+    finally:
+        # on Ctrl-C keep what was already computed, drop the queue
+        if pending:
+            storage.apply_scores(conn, pending, version)
+            stats["scored"] += len(pending)
+        ex.shutdown(wait=True, cancel_futures=True)
+        conn.close()
+        stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-score stored sessions from their keystroke traces")
+    ap.add_argument("--db", default=storage.DB_PATH)
+    ap.add_argument("--traces", default=str(TRACE_DIR), help="trace directory used to link old results")
+    ap.add_argument("--no-link", action="store_true", help="skip linking old results to traces")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=256, help="traces per worker task")
+    ap.add_argument("--batch", type=int, default=5000, help="results per write transaction")
+    args = ap.parse_args(argv)
+
+    storage.DB_PATH = args.db
+    try:
+        stats = rescore(args.workers, args.chunk, args.batch,
+                        None if args.no_link else Path(args.traces))
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume.")
+        sys.exit(130)
+    rate = stats["scored"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    print(f"Re-scored {stats['scored']:,} sessions in {stats['seconds']:.1f} s ({rate:,.0f}/s)"
+          + (f"; {stats['failed']:,} traces unreadable" if stats["failed"] else ""))
+
+
+if __name__ == "__main__":
+    main()
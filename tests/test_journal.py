@@ -0,0 +1,24 @@
+# tests/test_journal.py
+from typecore.journal import SessionJournal, recover
+
+
+def test_checkpoint_round_trip(tmp_path):
+    path = tmp_path / "session.tmj"
+    journal = SessionJournal(path)
+    journal.begin("abc def", time_limit=30, started_at=1000.0)
+    for t, key, expected in ((0.2, "a", "a"), (0.5, "b", "b"), (0.9, "x", "c")):
+        journal.record(t, key, expected)
+
+    for active in (12.3456, 2.5, 47.91, 3.7):
+        journal.checkpoint(active)
+        session = recover(path)
+        assert session is not None
+        assert session.active_seconds == active
+
+    assert session.text == "abc def"
+    assert session.typed == "abx"
+    assert session.correct_chars == 2
+    assert session.time_limit == 30
+    assert session.started_at == 1000.0
+    journal.reset()
+    assert recover(path) is None
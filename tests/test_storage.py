@@ -0,0 +1,49 @@
+# tests/test_storage.py
+from typecore import storage
+
+
+def _db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "DB_PATH", str(tmp_path / "users.db"))
+    uid = storage.upsert_user("guest")
+    conn = storage.get_conn()
+    conn.executemany(
+        "INSERT INTO results(user_id, wpm, accuracy, duration) VALUES (?, ?, 90, 60)",
+        [(uid, None if i % 4 == 0 else float(i % 5)) for i in range(23)],
+    )
+    conn.commit()
+    conn.close()
+    return uid
+
+
+def _walk(uid, descending, limit=5):
+    ids, after = [], None
+    while True:
+        rows = storage.fetch_results_page(uid, "wpm", descending, after, limit)
+        ids += [r[0] for r in rows]
+        if len(rows) < limit:
+            return ids
+        after = (rows[-1][1], rows[-1][0])
+
+
+def test_keyset_pages_cover_null_rows(tmp_path, monkeypatch):
+    uid = _db(tmp_path, monkeypatch)
+    for descending in (True, False):
+        ids = _walk(uid, descending)
+        assert sorted(ids) == list(range(1, 24))
+    # NULL sorts first ascending, ties by id
+    assert _walk(uid, False)[:6] == [1, 5, 9, 13, 17, 21]
+
+
+def test_offset_and_backwards_match_a_full_walk(tmp_path, monkeypatch):
+    uid = _db(tmp_path, monkeypatch)
+    order = storage.fetch_results_page(uid, "wpm", True, limit=100)
+    ids = [r[0] for r in order]
+    anchor = (order[4][1], order[4][0])
+    # forward from row 4, skipping 3 rows
+    rows = storage.fetch_results_page(uid, "wpm", True, anchor, 5, offset=3)
+    assert [r[0] for r in rows] == ids[8:13]
+    # backwards from row 15: flip the order, use its key, reverse the rows
+    anchor = (order[15][1], order[15][0])
+    rows = storage.fetch_results_page(uid, "wpm", False, anchor, 5, offset=2)
+    assert [r[0] for r in reversed(rows)] == ids[8:13]
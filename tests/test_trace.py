@@ -0,0 +1,15 @@
+# tests/test_trace.py
+from typecore import trace
+
+
+def test_new_trace_path_is_unique(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace, "TRACE_DIR", tmp_path)
+    monkeypatch.setattr(trace.time, "time", lambda: 1_700_000_000.123)
+    paths = [trace.new_trace_path() for _ in range(3)]
+    assert len(set(paths)) == 3
+    assert all(p.exists() for p in paths)
+
+    with trace.TraceWriter(paths[0], "abc") as w:
+        w.append(1000, ord("a"), ord("a"))
+    with trace.TraceReader(paths[0]) as r:
+        assert r.count == 1
@@ -0,0 +1,3 @@
+# typecore: engines, metrics, corpus and storage with no Qt dependency.
+# Keep this file empty of imports so `import typecore.engine` stays cheap;
+# NumPy is only loaded by the modules (or methods) that need it.
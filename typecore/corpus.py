@@ -0,0 +1,65 @@
+# typecore/corpus.py
+"""
+Bundled practice texts. Each file under assets/texts holds blocks
+separated by blank lines.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Optional
+import random
+
+TEXT_DIR = Path("assets/texts")
+
+# text source name (as shown in the UI) -> file under TEXT_DIR
+SOURCE_FILES = {
+    "Paragraph": "paragraph.txt",
+    "Quotes": "quotes.txt",
+    "Code Snippets": "codesnippets.txt",
+    "Numbers": "numbers.txt",
+    "Punctuation": "punctuation.txt",
+}
+
+FALLBACK_TEXT = "the quick brown fox jumps over the lazy dog"
+
+
+def load_blocks(filename: str, directory: Path = TEXT_DIR) -> List[str]:
+    p = Path(directory) / filename
+    try:
+        txt = p.read_text(encoding="utf-8").strip()
+    except OSError:
+        return []
+    return [b.strip() for b in txt.split("\n\n") if b.strip()]
+
+
+def endless(blocks: List[str], min_chars: int = 50000, rng: Optional[random.Random] = None) -> str:
+    """Shuffled blocks repeated until the text is at least `min_chars` long."""
+    if not blocks:
+        return ""
+    rng = rng or random
+    out, total, pool, i = [], 0, blocks[:], 0
+    rng.shuffle(pool)
+    while total < min_chars:
+        out.append(pool[i])
+        total += len(pool[i]) + 2
+        i = (i + 1) % len(pool)
+        if i == 0:
+            rng.shuffle(pool)
+    return "\n\n".join(out)
+
+
+def random_block(filename: str = "paragraph.txt", rng: Optional[random.Random] = None) -> str:
+    blocks = load_blocks(filename)
+    return (rng or random).choice(blocks) if blocks else ""
+
+
+def passage(filename: str = "paragraph.txt", rng: Optional[random.Random] = None) -> str:
+    """A random block, falling back to a pangram when the texts are missing."""
+    return random_block(filename, rng) or FALLBACK_TEXT
+
+
+def assemble(source: str, rng: Optional[random.Random] = None) -> str:
+    """Practice text for a UI text source; Paragraph mode is endless."""
+    blocks = load_blocks(SOURCE_FILES.get(source, "paragraph.txt"))
+    if source == "Paragraph":
+        return endless(blocks, rng=rng)
+    return (rng or random).choice(blocks) if blocks else ""
@@ -0,0 +1,101 @@
+# typecore/drill.py
+"""
+Weak-key drills: practice text weighted toward a user's slowest / most
+missed keys and bigrams.
+
+The corpus is indexed once (character / bigram -> word ids) and targets are
+drawn with Vose's alias method, so every drawn word costs O(1) and a drill
+of n words costs O(n) no matter how large the corpus is.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence
+import random
+
+from typecore.corpus import TEXT_DIR
+
+# code snippets are line-oriented and make poor drill words
+CORPUS_FILES = ("paragraph.txt", "quotes.txt", "punctuation.txt", "numbers.txt")
+
+
+class AliasSampler:
+    """O(n) setup, O(1) weighted draws (Vose's alias method)."""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("AliasSampler needs at least one weight")
+        total = float(sum(weights))
+        if total <= 0:
+            weights, total = [1.0] * n, float(n)
+        scaled = [w * n / total for w in weights]
+        self._prob = [0.0] * n
+        self._alias = [0] * n
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self._prob[i] = 1.0
+        self._n = n
+
+    def sample(self, rng: random.Random) -> int:
+        i = int(rng.random() * self._n)
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+
+class DrillIndex:
+    def __init__(self, words: Sequence[str]):
+        self.words: List[str] = list(dict.fromkeys(w for w in words if w))
+        self.postings: Dict[str, List[int]] = {}
+        for wid, word in enumerate(self.words):
+            low = word.lower()
+            grams = set(low) | {low[i:i + 2] for i in range(len(low) - 1)}
+            for g in grams:
+                self.postings.setdefault(g, []).append(wid)
+
+    @classmethod
+    def from_corpus(cls, directory: Path = TEXT_DIR, files: Sequence[str] = CORPUS_FILES) -> "DrillIndex":
+        words: List[str] = []
+        for name in files:
+            p = Path(directory) / name
+            try:
+                words.extend(p.read_text(encoding="utf-8").split())
+            except OSError:
+                continue
+        return cls(words)
+
+    def build(self, weights: Mapping[str, float], n_words: int = 500, rng: random.Random | None = None) -> str:
+        """
+        weights: {char or bigram: weakness score}. Targets missing from the
+        corpus are ignored; with no usable targets the drill is plain random words.
+        """
+        rng = rng or random.Random()
+        if not self.words:
+            return ""
+        targets = [(g, float(w)) for g, w in weights.items()
+                   if w > 0 and g.strip() and g.lower() in self.postings]
+        if not targets:
+            return " ".join(rng.choice(self.words) for _ in range(n_words))
+        sampler = AliasSampler([w for _, w in targets])
+        lists = [self.postings[g.lower()] for g, _ in targets]
+        out = []
+        for _ in range(n_words):
+            ids = lists[sampler.sample(rng)]
+            out.append(self.words[ids[int(rng.random() * len(ids))]])
+        return " ".join(out)
+
+
+_INDEX: DrillIndex | None = None
+
+
+def corpus_index() -> DrillIndex:
+    """Index of the bundled texts, built on first use and kept for the process."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = DrillIndex.from_corpus()
+    return _INDEX
@@ -0,0 +1,62 @@
+# typecore/engine.py
+from typecore import scoring
+
+class TypingStats:
+    # a plain slotted class: importing dataclasses alone costs ~20 ms
+    __slots__ = ("keystrokes", "correct_chars", "errors")
+
+    def __init__(self, keystrokes: int = 0, correct_chars: int = 0, errors: int = 0):
+        self.keystrokes = keystrokes
+        self.correct_chars = correct_chars
+        self.errors = errors
+
+    def __repr__(self):
+        return (f"TypingStats(keystrokes={self.keystrokes}, "
+                f"correct_chars={self.correct_chars}, errors={self.errors})")
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.keystrokes, self.correct_chars, self.errors) == \
+            (other.keystrokes, other.correct_chars, other.errors)
+
+class TypingEngine:
+    def __init__(self, target_text: str = ""):
+        self.set_text(target_text)
+        self.stats = TypingStats()
+
+    def set_text(self, text: str):
+        self.target = text or ""
+        self.typed = ""
+
+    def reset(self):
+        self.typed = ""
+        self.stats = TypingStats()
+
+    def process_key(self, ch: str):
+        if not ch:
+            return
+        self.stats.keystrokes += 1
+        if len(self.typed) < len(self.target) and ch == self.target[len(self.typed)]:
+            self.stats.correct_chars += 1
+        else:
+            self.stats.errors += 1
+        self.typed += ch
+
+    def backspace(self):
+        """Remove the last typed char and its stats (same result as a full recount)."""
+        if not self.typed:
+            return
+        i = len(self.typed) - 1
+        self.stats.keystrokes = max(0, self.stats.keystrokes - 1)
+        if i < len(self.target) and self.typed[i] == self.target[i]:
+            self.stats.correct_chars -= 1
+        else:
+            self.stats.errors = max(0, self.stats.errors - 1)
+        self.typed = self.typed[:-1]
+
+    def accuracy(self) -> float:
+        return scoring.accuracy(self.stats.correct_chars, self.stats.keystrokes)
+
+    def wpm(self, active_seconds: float) -> float:
+        return scoring.wpm(self.stats.correct_chars, active_seconds)
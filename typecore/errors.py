@@ -3,3 +3,6 @@ class TypemasterError(Exception):
 
 class DatabaseError(TypemasterError):
     pass
+
+class TraceError(TypemasterError):
+    pass
@@ -0,0 +1,66 @@
+# typecore/ghost.py
+"""
+Ghost racers: replay a stored keystroke trace as a caret moving in real time.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from typecore.errors import TraceError
+from typecore.trace import (
+    BACKSPACE, TRACE_DIR, TRACE_SUFFIX, TraceReader, read_header, text_digest,
+)
+
+
+class Ghost:
+    """
+    Caret position of a previous session at any point in (active) time.
+
+    The trace records stay memory-mapped; the cumulative time and caret
+    columns are built once on load so each frame is a single binary search.
+    """
+
+    def __init__(self, path):
+        self.reader = TraceReader(path)
+        self.wpm = self.reader.header.wpm
+        rec = self.reader.records
+        self._times_us = np.cumsum(rec["dt"], dtype=np.int64)
+        steps = np.where(rec["key"] == BACKSPACE, -1, 1).astype(np.int32)
+        self._caret = np.maximum(np.cumsum(steps, dtype=np.int32), 0)
+
+    def __reduce__(self):
+        return (type(self), (str(self.reader.path),))
+
+    def position_at(self, seconds: float) -> int:
+        i = int(self._times_us.searchsorted(int(seconds * 1_000_000), side="right"))
+        return int(self._caret[i - 1]) if i else 0
+
+    def close(self):
+        self.reader.close()
+
+
+def best_traces(text: str, limit: int = 1, directory: Path = TRACE_DIR) -> List[Path]:
+    """Fastest traces recorded on this exact passage (header scan only)."""
+    digest = text_digest(text)
+    found = []
+    for p in Path(directory).glob(f"*{TRACE_SUFFIX}"):
+        try:
+            h = read_header(p)
+        except (OSError, TraceError):
+            continue
+        if h.digest == digest and h.count:
+            found.append((h.wpm, p))
+    found.sort(key=lambda r: r[0], reverse=True)
+    return [p for _, p in found[:limit]]
+
+
+def load_ghosts(text: str, limit: int = 1) -> List[Ghost]:
+    ghosts = []
+    for p in best_traces(text, limit):
+        try:
+            ghosts.append(Ghost(p))
+        except (OSError, TraceError):
+            continue
+    return ghosts
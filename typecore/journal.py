@@ -0,0 +1,288 @@
+# typecore/journal.py
+"""
+Crash-safe journal of the running test.
+
+Every keystroke is appended to a memory-mapped file as it is typed, so an
+unhandled exception or a killed process loses nothing: the OS writes the
+mapped pages back on its own. A checkpoint about once a second stores the
+active time, flushes the map (covers an OS crash too) and, on long
+sessions, drops the already-flushed pages from the process' memory.
+
+File layout (little endian):
+  header   48 bytes  magic, version, state, text length, record count,
+                     text digest, started_at, time limit, active seconds
+  text     utf-8 target passage
+  records  12 bytes each, same format as trace records (typecore/trace.py)
+
+The record count is updated after each record is written; a journal whose
+state is still OPEN at startup belongs to a session that never finished.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from typecore.scoring import surviving
+from typecore.trace import RECORD_DTYPE, _RECORD, _U32_MAX, key_codepoint, text_digest
+
+JOURNAL_PATH = Path("data/journal/session.tmj")
+MAGIC = b"TMJR"
+VERSION = 1
+
+STATE_OPEN = 1
+STATE_CLOSED = 2
+
+_HEADER = struct.Struct("<4sHHII8sdId")
+HEADER_SIZE = 48
+_COUNT = struct.Struct("<I")
+_COUNT_OFFSET = 12
+_CHECKPOINT = struct.Struct("<d")
+# the last header field; everything before it packs to 36 bytes
+_CHECKPOINT_OFFSET = struct.calcsize("<4sHHII8sdI")
+
+_INITIAL_RECORDS = 4096
+# the most recent pages stay resident on spill; they are still being appended to
+_KEEP_RESIDENT = 256 * 1024
+
+
+@dataclass
+class RecoveredSession:
+    text: str
+    typed: str
+    keystrokes: int
+    correct_chars: int
+    active_seconds: float
+    started_at: float
+    time_limit: Optional[int]
+    records: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class SessionJournal:
+    """
+    Keystroke recorder backed by the journal file. Drop-in for
+    TraceRecorder (reset / record / records / len) plus begin(), end()
+    and checkpoint(). Falls back to an anonymous map if the file cannot be
+    created, so typing never fails because of the journal.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = Path(path)
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        self._base = HEADER_SIZE
+        self._count = 0
+        self._last_us = 0
+        self._flushed = 0       # bytes of the map already flushed to disk
+        self._ended = np.empty(0, dtype=RECORD_DTYPE)
+
+    # ---- lifecycle ----
+    def begin(self, text: str, time_limit: Optional[int] = None, started_at: Optional[float] = None):
+        """Start journaling a new test (replaces any previous journal)."""
+        self.reset()
+        raw = (text or "").encode("utf-8")
+        self._base = HEADER_SIZE + len(raw)
+        size = self._base + _INITIAL_RECORDS * _RECORD.size
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w+b")
+            self._file.truncate(size)
+            self._mm = mmap.mmap(self._file.fileno(), size)
+        except (OSError, ValueError) as e:
+            print(f"Journal error: {e}")
+            self._close_file()
+            self._mm = mmap.mmap(-1, size)
+        self._mm[:HEADER_SIZE] = _HEADER.pack(
+            MAGIC, VERSION, STATE_OPEN, len(raw), 0, text_digest(text),
+            started_at if started_at is not None else time.time(), time_limit or 0, 0.0,
+        ).ljust(HEADER_SIZE, b"\0")
+        self._mm[HEADER_SIZE:self._base] = raw
+        self._flushed = 0
+
+    def resume(self, session: RecoveredSession):
+        """Continue journaling a recovered session (same file, appending)."""
+        self.begin(session.text, session.time_limit, session.started_at)
+        self.extend(session.records)
+        self.checkpoint(session.active_seconds)
+
+    def reset(self):
+        """Drop the journal (test abandoned, or finished and saved)."""
+        if self._mm is not None:
+            # in case the unlink below fails, never offer this one for recovery
+            struct.pack_into("<H", self._mm, 6, STATE_CLOSED)
+        self._close_map()
+        self._close_file()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+        self._count = 0
+        self._last_us = 0
+        self._flushed = 0
+        self._ended = np.empty(0, dtype=RECORD_DTYPE)
+
+    def end(self):
+        """Session saved: remove the journal, keep its records readable."""
+        records = self.records()
+        self.reset()
+        self._ended = records
+        self._count = len(records)
+
+    @property
+    def is_open(self) -> bool:
+        return self._mm is not None
+
+    def _close_map(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass
+            self._mm = None
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    # ---- recording ----
+    def __len__(self) -> int:
+        return self._count
+
+    def _reserve(self, n: int):
+        need = self._base + (self._count + n) * _RECORD.size
+        if need <= len(self._mm):
+            return
+        size = len(self._mm)
+        while size < need:
+            size *= 2
+        # resize() grows the file too; nothing holds a view onto the map
+        self._mm.resize(size)
+
+    def record(self, t: float, key: str, expected: str = "") -> int:
+        """t is active session time in seconds. Returns the delta in microseconds."""
+        us = int(t * 1_000_000)
+        dt = min(max(0, us - self._last_us), _U32_MAX)
+        self._last_us = max(self._last_us, us)
+        if self._mm is None:
+            return dt
+        self._reserve(1)
+        _RECORD.pack_into(self._mm, self._base + self._count * _RECORD.size,
+                          dt, key_codepoint(key), key_codepoint(expected))
+        self._count += 1
+        _COUNT.pack_into(self._mm, _COUNT_OFFSET, self._count)
+        return dt
+
+    def extend(self, records: np.ndarray):
+        if self._mm is None or not len(records):
+            return
+        arr = np.ascontiguousarray(records, dtype=RECORD_DTYPE)
+        self._reserve(len(arr))
+        off = self._base + self._count * _RECORD.size
+        self._mm[off:off + arr.nbytes] = arr.tobytes()
+        self._count += len(arr)
+        self._last_us += int(arr["dt"].sum(dtype=np.int64))
+        _COUNT.pack_into(self._mm, _COUNT_OFFSET, self._count)
+
+    def records(self) -> np.ndarray:
+        # copy: a live view would pin the map and block resize()
+        if self._mm is None:
+            return self._ended
+        if not self._count:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        end = self._base + self._count * _RECORD.size
+        return np.frombuffer(self._mm[self._base:end], dtype=RECORD_DTYPE)
+
+    # ---- checkpoints ----
+    def checkpoint(self, active_seconds: float):
+        """Store the active time, flush new pages and spill old ones from RAM."""
+        if self._mm is None:
+            return
+        _CHECKPOINT.pack_into(self._mm, _CHECKPOINT_OFFSET, float(active_seconds))
+        if self._file is None:
+            return
+        end = self._base + self._count * _RECORD.size
+        # flush offsets must be aligned; the header is always included
+        gran = mmap.ALLOCATIONGRANULARITY
+        start = self._flushed - self._flushed % gran
+        try:
+            self._mm.flush(0, min(len(self._mm), gran))
+            if end > start:
+                self._mm.flush(start, end - start)
+        except OSError as e:
+            print(f"Journal flush error: {e}")
+            return
+        self._flushed = end
+        self._spill(end)
+
+    def _spill(self, end: int):
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        cut = end - _KEEP_RESIDENT
+        cut -= cut % mmap.PAGESIZE
+        # pages below `cut` are on disk; reading them later faults them back
+        if cut > mmap.PAGESIZE:
+            try:
+                self._mm.madvise(mmap.MADV_DONTNEED, mmap.PAGESIZE, cut - mmap.PAGESIZE)
+            except OSError:
+                pass
+
+
+def recover(path=JOURNAL_PATH) -> Optional[RecoveredSession]:
+    """
+    The unfinished session left in the journal, or None. Only the header
+    and records are read; scoring is vectorized, so this takes a few
+    milliseconds even for very long sessions.
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, state, text_len, count, _digest, started, limit, active = _HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION or state != STATE_OPEN:
+            return None
+        base = HEADER_SIZE + text_len
+        if base > len(mm):
+            return None
+        text = mm[HEADER_SIZE:base].decode("utf-8", errors="replace")
+        count = min(count, (len(mm) - base) // _RECORD.size)
+        records = np.frombuffer(mm[base:base + count * _RECORD.size], dtype=RECORD_DTYPE)
+    finally:
+        mm.close()
+    # after an OS crash the count may run ahead of what reached the disk;
+    # unwritten records read back as zeros and no real keystroke has key 0
+    written = np.flatnonzero(records["key"])
+    records = records[:written[-1] + 1] if len(written) else records[:0]
+    if not len(records):
+        return None
+    keep = surviving(records)
+    typed_keys = records["key"][keep]
+    typed = typed_keys.astype("<u4").tobytes().decode("utf-32-le", errors="replace")
+    correct = int(np.count_nonzero(typed_keys == records["expected"][keep]))
+    last_key = int(records["dt"].sum(dtype=np.int64)) / 1_000_000.0
+    return RecoveredSession(
+        text=text,
+        typed=typed,
+        keystrokes=len(typed),
+        correct_chars=correct,
+        active_seconds=max(active, last_key),
+        started_at=started,
+        time_limit=limit or None,
+        records=records,
+    )
@@ -0,0 +1,115 @@
+# typecore/keytiming.py
+"""
+Inter-key interval analytics over a session's keystroke records.
+
+All statistics are computed with vectorized NumPy over the trace columns
+(see typecore/trace.py), so a 50k-keystroke session is analysed in a few
+milliseconds.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from typecore.trace import BACKSPACE
+
+# gaps longer than this are treated as the user pausing, not typing
+MAX_GAP_MS = 2000.0
+
+_DIGRAPH_SHIFT = 21  # unicode codepoints fit in 21 bits
+
+
+@dataclass
+class TimingTable:
+    """Column-oriented latency stats; one row per key (or digraph)."""
+    labels: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    count: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    median_ms: np.ndarray = field(default_factory=lambda: np.empty(0))
+    p90_ms: np.ndarray = field(default_factory=lambda: np.empty(0))
+    error_rate: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def rows(self) -> List[Tuple[str, int, float, float, float]]:
+        return list(zip(
+            self.labels.tolist(), self.count.tolist(), self.median_ms.tolist(),
+            self.p90_ms.tolist(), self.error_rate.tolist(),
+        ))
+
+    def by_label(self) -> Dict[str, Tuple[float, float]]:
+        """{label: (median_ms, p90_ms)} for quick joins against other tables."""
+        return dict(zip(self.labels.tolist(), zip(self.median_ms.tolist(), self.p90_ms.tolist())))
+
+
+@dataclass
+class TimingReport:
+    keys: TimingTable
+    digraphs: TimingTable
+
+
+def _lower(cp: np.ndarray) -> np.ndarray:
+    upper = (cp >= 65) & (cp <= 90)
+    return np.where(upper, cp + 32, cp)
+
+
+def _group_stats(codes: np.ndarray, lat: np.ndarray, err: np.ndarray):
+    order = np.lexsort((lat, codes))
+    c, l, e = codes[order], lat[order], err[order]
+    uniq, start, counts = np.unique(c, return_index=True, return_counts=True)
+
+    def quantile(q: float) -> np.ndarray:
+        # linear interpolation between sorted neighbours (matches np.percentile)
+        pos = start + (counts - 1) * q
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        frac = pos - lo
+        return l[lo] * (1.0 - frac) + l[hi] * frac
+
+    errors = np.add.reduceat(e.astype(np.int64), start) if len(start) else np.empty(0)
+    return uniq, counts, quantile(0.5), quantile(0.9), errors / np.maximum(counts, 1)
+
+
+def _table(codes, lat, err, label_fn) -> TimingTable:
+    if len(codes) == 0:
+        return TimingTable()
+    uniq, counts, med, p90, rate = _group_stats(codes, lat, err)
+    labels = np.array([label_fn(int(u)) for u in uniq], dtype=object)
+    return TimingTable(labels, counts, med, p90, rate)
+
+
+def _digraph_label(code: int) -> str:
+    return chr(code >> _DIGRAPH_SHIFT) + chr(code & ((1 << _DIGRAPH_SHIFT) - 1))
+
+
+def analyze(records: np.ndarray, max_gap_ms: float = MAX_GAP_MS) -> TimingReport:
+    """
+    records: structured array with dt (us), key and expected codepoints.
+
+    Latency of a keystroke is the interval since the previous keystroke.
+    Keys are grouped by the (lowercased) character that was expected, so a
+    slow or missed 'e' shows up under 'e' whatever was actually pressed.
+    """
+    if records is None or len(records) < 2:
+        return TimingReport(TimingTable(), TimingTable())
+
+    key = records["key"].astype(np.int64)
+    expected = _lower(records["expected"].astype(np.int64))
+    lat = records["dt"].astype(np.float64) / 1000.0
+
+    typed = (key != BACKSPACE) & (expected > 0)
+    valid = typed.copy()
+    valid[0] = False  # first keystroke has no preceding interval
+    valid &= lat <= max_gap_ms
+    err = key != records["expected"].astype(np.int64)
+
+    keys = _table(expected[valid], lat[valid], err[valid], chr)
+
+    # digraph = previous expected char + this one, both real typing keystrokes
+    pair = valid[1:] & typed[:-1]
+    prev, cur = expected[:-1][pair], expected[1:][pair]
+    codes = (prev << _DIGRAPH_SHIFT) | cur
+    digraphs = _table(codes, lat[1:][pair], err[1:][pair], _digraph_label)
+
+    return TimingReport(keys, digraphs)
@@ -0,0 +1,146 @@
+# typecore/lexer.py
+"""
+Regex syntax lexer for code texts.
+
+tokenize() turns a text into token spans (keywords, strings, comments,
+numbers) plus a per-char class map the code view can overlay directly.
+It is meant to run once per distinct text on a worker thread (see
+core/threads.py LexWorker); results are memoized by content hash, and
+cached() is the cheap lookup the UI uses before starting a worker.
+"""
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
+import re
+import threading
+
+# token classes; 0 is plain text
+PLAIN, KEYWORD, STRING, COMMENT, NUMBER = 0, 1, 2, 3, 4
+
+_NUMBER = r"(?<![\w$.])(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+
+
+def _keywords(words: str) -> str:
+    return r"(?<![\w$])(?:" + "|".join(sorted(words.split(), key=len, reverse=True)) + r")(?![\w$])"
+
+
+# one alternation per language; group order sets precedence (comments and
+# strings first, so keywords inside them are not picked up)
+_LANGUAGES = {
+    "javascript": re.compile("|".join((
+        r"(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))",
+        r"(?P<string>\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?|`(?:\\.|[^`\\])*`?)",
+        "(?P<keyword>" + _keywords(
+            "break case catch class const continue debugger default delete do else export "
+            "extends finally for function if import in instanceof let new return super switch "
+            "this throw try typeof var void while with yield async await of static get set "
+            "true false null undefined NaN Infinity"
+        ) + ")",
+        "(?P<number>" + _NUMBER + ")",
+    )), re.S),
+    "python": re.compile("|".join((
+        r"(?P<comment>#[^\n]*)",
+        r"(?P<string>(?:[rRbBuUfF]{1,2})?(?:\"\"\".*?(?:\"\"\"|\Z)|'''.*?(?:'''|\Z)"
+        r"|\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?))",
+        "(?P<keyword>" + _keywords(
+            "False None True and as assert async await break class continue def del elif else "
+            "except finally for from global if import in is lambda nonlocal not or pass raise "
+            "return try while with yield self match case"
+        ) + ")",
+        "(?P<number>" + _NUMBER + ")",
+    )), re.S),
+    "c": re.compile("|".join((
+        r"(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z)|^[ \t]*#[^\n]*)",
+        r"(?P<string>\"(?:\\.|[^\"\\\n])*\"?|'(?:\\.|[^'\\\n])*'?)",
+        "(?P<keyword>" + _keywords(
+            "auto bool break case catch char class const continue default delete do double else "
+            "enum extern false float for func go goto if import int interface long namespace new "
+            "nullptr package private protected public return short signed sizeof static struct "
+            "switch template this throw true try typedef typename union unsigned using var virtual "
+            "void volatile while fn let mut impl pub use match"
+        ) + ")",
+        "(?P<number>" + _NUMBER + ")",
+    )), re.S | re.M),
+}
+
+_KINDS = {"comment": COMMENT, "string": STRING, "keyword": KEYWORD, "number": NUMBER}
+
+_PY_HINT = re.compile(r"^[ \t]*(?:def|class)\s+\w+.*:[ \t]*$|^[ \t]*(?:elif|except|from\s+\S+\s+import)\b", re.M)
+_JS_HINT = re.compile(r"\b(?:function|const|let|var)\b|\b(?:console|document)\.|=>|===")
+
+
+def detect_language(text: str) -> str:
+    """Best guess among the supported lexers ("javascript", "python", "c")."""
+    head = text[:20000]
+    if _PY_HINT.search(head) and "{" not in head:
+        return "python"
+    if _JS_HINT.search(head):
+        return "javascript"
+    if _PY_HINT.search(head):
+        return "python"
+    return "c"
+
+
+@dataclass(frozen=True)
+class Tokens:
+    language: str
+    starts: array       # token start offsets ("i")
+    ends: array         # token end offsets ("i")
+    kinds: bytes        # class of each token
+    classes: bytes      # class of each char, len == len(text)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+
+def tokenize(text: str, language: Optional[str] = None) -> Tokens:
+    """Lex `text` (uncached; use lex() / cached() from the UI)."""
+    language = language or detect_language(text)
+    pattern = _LANGUAGES[language]
+    starts, ends, kinds = array("i"), array("i"), bytearray()
+    classes = bytearray(len(text))
+    fill = [b"", *(bytes([k]) for k in range(1, 5))]
+    for m in pattern.finditer(text):
+        kind = _KINDS[m.lastgroup]
+        a, b = m.span()
+        starts.append(a)
+        ends.append(b)
+        kinds.append(kind)
+        classes[a:b] = fill[kind] * (b - a)
+    return Tokens(language, starts, ends, bytes(kinds), bytes(classes))
+
+
+# ---- cache (shared between the GUI thread and lexer workers) ----
+_CACHE_SIZE = 16
+_cache: "OrderedDict[bytes, Tokens]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.blake2b((text or "").encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def cached(text: str, key: Optional[bytes] = None) -> Optional[Tokens]:
+    key = key or content_key(text)
+    with _lock:
+        tokens = _cache.get(key)
+        if tokens is not None:
+            _cache.move_to_end(key)
+        return tokens
+
+
+def lex(text: str, key: Optional[bytes] = None) -> Tokens:
+    """Tokens for `text`, lexed at most once per distinct content."""
+    key = key or content_key(text)
+    tokens = cached(text, key)
+    if tokens is not None:
+        return tokens
+    tokens = tokenize(text)
+    with _lock:
+        _cache[key] = tokens
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return tokens
@@ -0,0 +1,210 @@
+# typecore/ngrams.py
+"""
+Incremental n-gram weakness miner.
+
+Bigram/trigram latency and error totals are kept in count-min sketches
+(fixed memory no matter how many distinct n-grams a user types), while a
+bounded min-heap tracks the k worst n-grams seen so far. Sketches of two
+miners with the same shape simply add, so per-session miners are merged
+into an all-time one without rescanning old sessions.
+"""
+from __future__ import annotations
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple
+from array import array
+import hashlib
+import heapq
+
+NGRAM_DIR = Path("data")
+
+# gaps longer than this are the user pausing; they break the n-gram chain
+MAX_GAP_MS = 2000.0
+
+
+def history_path(user_id) -> Path:
+    return NGRAM_DIR / f"ngrams_{user_id}.npz"
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        # flat row-major table; plain array keeps NumPy out of the import path
+        # and scalar indexing cheap
+        self.table = array("d", bytes(8 * width * depth))
+
+    def grid(self):
+        """(depth, width) NumPy view of the table, for bulk operations."""
+        import numpy as np
+        return np.frombuffer(self.table, dtype=np.float64).reshape(self.depth, self.width)
+
+    def _cols(self, key: str) -> Tuple[int, ...]:
+        # double hashing: one stable 128-bit digest gives all `depth` cells
+        d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(d[:8], "little")
+        h2 = int.from_bytes(d[8:], "little") | 1
+        w = self.width
+        return tuple(row * w + (h1 + row * h2) % w for row in range(self.depth))
+
+    def add(self, key: str, value: float = 1.0, cols: Tuple[int, ...] | None = None):
+        cols = self._cols(key) if cols is None else cols
+        t = self.table
+        for i in cols:
+            t[i] += value
+
+    def estimate(self, key: str, cols: Tuple[int, ...] | None = None) -> float:
+        cols = self._cols(key) if cols is None else cols
+        t = self.table
+        return min(t[i] for i in cols)
+
+    def merge(self, other: "CountMinSketch"):
+        if (self.depth, self.width) != (other.depth, other.width):
+            raise ValueError("Cannot merge sketches of different shape")
+        g = self.grid()
+        g += other.grid()
+
+
+class NgramMiner:
+    """
+    Per-keystroke updates are O(depth) per n-gram order; worst() is O(k log k)
+    over the fixed-size candidate set.
+    """
+
+    def __init__(self, orders=(2, 3), width: int = 4096, depth: int = 4,
+                 top_k: int = 64, min_count: int = 3):
+        self.orders = tuple(orders)
+        self.top_k = top_k
+        self.min_count = min_count
+        self.counts = CountMinSketch(width, depth)
+        self.latency = CountMinSketch(width, depth)
+        self.errors = CountMinSketch(width, depth)
+        self._top: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._recent = deque(maxlen=max(self.orders))
+
+    # ---------- updates ----------
+    def reset_context(self):
+        """Forget the preceding characters (backspace, pause, new session)."""
+        self._recent.clear()
+
+    def update(self, expected: str, latency_ms: float, error: bool):
+        if not expected:
+            return
+        if latency_ms > MAX_GAP_MS:
+            self._recent.clear()
+        self._recent.append(expected.lower())
+        if len(self._recent) < 2:
+            return
+        tail = "".join(self._recent)
+        for n in self.orders:
+            if len(tail) >= n:
+                self._add(tail[-n:], latency_ms, error)
+
+    def _add(self, gram: str, latency_ms: float, error: bool):
+        cols = self.counts._cols(gram)
+        self.counts.add(gram, 1.0, cols)
+        self.latency.add(gram, latency_ms, cols)
+        if error:
+            self.errors.add(gram, 1.0, cols)
+        self._offer(gram, self._score(gram, cols))
+
+    # ---------- scoring / top-k ----------
+    def stats(self, gram: str, cols: Tuple[int, ...] | None = None) -> Tuple[float, float, float]:
+        """(count, mean latency ms, error rate) estimates for one n-gram."""
+        cols = self.counts._cols(gram) if cols is None else cols
+        count = self.counts.estimate(gram, cols)
+        if count <= 0:
+            return 0.0, 0.0, 0.0
+        mean = self.latency.estimate(gram, cols) / count
+        err = min(1.0, self.errors.estimate(gram, cols) / count)
+        return count, mean, err
+
+    def _score(self, gram: str, cols: Tuple[int, ...] | None = None) -> float:
+        count, mean, err = self.stats(gram, cols)
+        if count < self.min_count:
+            return 0.0
+        # slow AND error-prone n-grams rank highest
+        return mean * (1.0 + 2.0 * err)
+
+    def _offer(self, gram: str, score: float):
+        if gram in self._top:
+            self._top[gram] = score
+            heapq.heappush(self._heap, (score, gram))
+        elif len(self._top) < self.top_k:
+            self._top[gram] = score
+            heapq.heappush(self._heap, (score, gram))
+        else:
+            low = self._min_entry()
+            if low is None or score <= low[0]:
+                return
+            heapq.heappop(self._heap)
+            del self._top[low[1]]
+            self._top[gram] = score
+            heapq.heappush(self._heap, (score, gram))
+        if len(self._heap) > 4 * self.top_k:
+            self._heap = [(s, g) for g, s in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def _min_entry(self):
+        # drop stale heap entries (n-grams whose score has since changed)
+        while self._heap:
+            s, g = self._heap[0]
+            if self._top.get(g) == s:
+                return s, g
+            heapq.heappop(self._heap)
+        return None
+
+    def worst(self, n: int = 10) -> List[Tuple[str, float, int, float, float]]:
+        """[(ngram, score, count, mean_ms, error_rate)] worst first."""
+        ranked = heapq.nlargest(n, self._top.items(), key=lambda kv: kv[1])
+        out = []
+        for gram, score in ranked:
+            if score <= 0:
+                continue
+            count, mean, err = self.stats(gram)
+            out.append((gram, score, int(count), mean, err))
+        return out
+
+    # ---------- merge / persistence ----------
+    def merge(self, other: "NgramMiner"):
+        self.counts.merge(other.counts)
+        self.latency.merge(other.latency)
+        self.errors.merge(other.errors)
+        candidates = set(self._top) | set(other._top)
+        scored = sorted(((self._score(g), g) for g in candidates), reverse=True)[:self.top_k]
+        self._top = {g: s for s, g in scored}
+        self._heap = [(s, g) for s, g in scored]
+        heapq.heapify(self._heap)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        import numpy as np
+        grams = list(self._top)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                counts=self.counts.grid(),
+                latency=self.latency.grid(),
+                errors=self.errors.grid(),
+                grams=np.array(grams, dtype=str),
+                params=np.array([self.top_k, self.min_count, *self.orders], dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path) -> "NgramMiner":
+        import numpy as np
+        with np.load(path) as data:
+            params = data["params"].tolist()
+            depth, width = data["counts"].shape
+            miner = cls(orders=params[2:], width=width, depth=depth,
+                        top_k=params[0], min_count=params[1])
+            miner.counts.grid()[:] = data["counts"]
+            miner.latency.grid()[:] = data["latency"]
+            miner.errors.grid()[:] = data["errors"]
+            grams = data["grams"].tolist()
+        miner._top = {g: miner._score(g) for g in grams}
+        miner._heap = [(s, g) for g, s in miner._top.items()]
+        heapq.heapify(miner._heap)
+        return miner
@@ -0,0 +1,81 @@
+# typecore/scoring.py
+"""
+The session metrics formulas, in one place.
+
+TypingEngine scores live sessions with wpm() / accuracy(); score_trace()
+replays a stored keystroke trace into the same final stats so old results
+can be re-scored (see services/rescore.py). Bump SCORE_VERSION whenever a
+formula changes; rows scored with an older version are picked up again.
+"""
+from __future__ import annotations
+from typing import Tuple
+
+SCORE_VERSION = 1
+
+
+def wpm(correct_chars: int, active_seconds: float) -> float:
+    # WPM = (correct_chars / 5) / (active_time_minutes)
+    s = max(1e-6, active_seconds)
+    return (correct_chars / 5.0) / (s / 60.0)
+
+
+def accuracy(correct_chars: int, keystrokes: int) -> float:
+    """Fraction in [0, 1]; results store it as a percentage."""
+    k = max(1, keystrokes)
+    return max(0.0, min(1.0, correct_chars / k))
+
+
+def surviving(records):
+    """
+    Boolean mask of the keystrokes still in the typed text at the end of
+    the trace `records` (backspaced chars and backspaces are False).
+
+    A backspace removes the char before the caret (and is a no-op at 0),
+    so a char typed at caret position p survives iff the caret never drops
+    to p or below afterwards. The caret is the running sum of +1 / -1 steps
+    reflected at zero.
+    """
+    import numpy as np
+    from typecore.trace import BACKSPACE
+
+    n = len(records)
+    typed = records["key"] != BACKSPACE
+    if not n:
+        return typed
+    steps = np.where(typed, 1, -1).astype(np.int64)
+    walk = np.cumsum(steps)
+    caret = walk - np.minimum(np.minimum.accumulate(walk), 0)
+    before = np.empty(n, dtype=np.int64)
+    before[0] = 0
+    before[1:] = caret[:-1]
+    # lowest caret from each stroke to the end of the session
+    floor = np.minimum.accumulate(caret[::-1])[::-1]
+    later = np.empty(n, dtype=np.int64)
+    later[:-1] = floor[1:]
+    later[-1] = caret[-1]
+    return typed & (later > before)
+
+
+def replay_counts(records) -> Tuple[int, int]:
+    """
+    (keystrokes, correct_chars) that a TypingEngine ends with after typing
+    the trace `records`, without replaying it key by key.
+    """
+    import numpy as np
+
+    if not len(records):
+        return 0, 0
+    survives = surviving(records)
+    keystrokes = int(np.count_nonzero(survives))
+    correct = int(np.count_nonzero(survives & (records["key"] == records["expected"])))
+    return keystrokes, correct
+
+
+def score_trace(reader) -> Tuple[float, float, float]:
+    """(wpm, accuracy %, active seconds) for an open TraceReader."""
+    rec = reader.records
+    keystrokes, correct = replay_counts(rec)
+    seconds = reader.header.duration
+    if seconds <= 0 and len(rec):
+        seconds = int(rec["dt"].sum(dtype="u8")) / 1_000_000.0
+    return wpm(correct, seconds), accuracy(correct, keystrokes) * 100.0, seconds
@@ -0,0 +1,248 @@
+from __future__ import annotations
+from time import perf_counter_ns
+import sqlite3, os
+from typecore import tracing
+from typecore.errors import DatabaseError
+from typecore.scoring import SCORE_VERSION
+
+DB_PATH = "data/users.db"
+
+# columns the history view may sort on (each has a (user_id, key) index)
+RESULT_SORT_COLUMNS = ("created_at", "wpm", "accuracy", "duration")
+
+def _sort_key(col: str) -> str:
+    # NULL stays first, as SQLite orders it, but as a real value (-inf), so
+    # row-value keyset comparisons step over NULL rows instead of stopping
+    return f"COALESCE({col}, -9e999)"
+
+def _ensure_schema(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS users(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS results(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        wpm REAL,
+        accuracy REAL,
+        duration REAL,
+        weak_keys_json TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    );
+    """)
+    # history browsing sorts and pages per user; id is the rowid, so each
+    # index also orders ties by id for keyset pagination. The indexes are on
+    # the _sort_key() expression so the planner can use them for ORDER BY.
+    for col in RESULT_SORT_COLUMNS:
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_results_user_{col}_key ON results(user_id, {_sort_key(col)})"
+        )
+    _migrate_results(conn)
+
+# columns added after the first release: name -> declaration
+_RESULT_MIGRATIONS = (
+    # keystroke trace of the session; NULL = not linked yet, '' = has none
+    ("trace_path", "TEXT"),
+    # scoring.SCORE_VERSION the stored metrics were computed with
+    ("score_version", "INTEGER DEFAULT 0"),
+)
+
+def _migrate_results(conn):
+    have = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    for name, decl in _RESULT_MIGRATIONS:
+        if name not in have:
+            conn.execute(f"ALTER TABLE results ADD COLUMN {name} {decl}")
+    # plain (user_id, col) indexes, replaced by the _sort_key() ones
+    for col in RESULT_SORT_COLUMNS:
+        conn.execute(f"DROP INDEX IF EXISTS idx_results_user_{col}")
+
+# DB_PATHs whose schema this process has already set up; connections are
+# opened per call (history paging, saving a result), so this runs once
+_schema_ready = set()
+
+def get_conn():
+    if DB_PATH in _schema_ready:
+        return sqlite3.connect(DB_PATH)
+    os.makedirs("data", exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    _ensure_schema(conn)
+    _schema_ready.add(DB_PATH)
+    return conn
+
+def upsert_user(username: str) -> int:
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute("INSERT OR IGNORE INTO users(username) VALUES (?)", (username,))
+        conn.commit()
+        cur.execute("SELECT id FROM users WHERE username=?", (username,))
+        row = cur.fetchone()
+        return row[0]
+    except Exception as e:
+        raise DatabaseError(str(e))
+    finally:
+        conn.close()
+
+def insert_result(user_id: int, wpm: float, accuracy: float, duration: float, weak_keys_json: str,
+                  trace_path: str | None = None):
+    t0 = perf_counter_ns()
+    try:
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO results(user_id, wpm, accuracy, duration, weak_keys_json, trace_path, score_version) "
+            "VALUES (?,?,?,?,?,?,?)",
+            (user_id, wpm, accuracy, duration, weak_keys_json, trace_path, SCORE_VERSION)
+        )
+        conn.commit()
+    except Exception as e:
+        raise DatabaseError(str(e))
+    finally:
+        conn.close()
+        tracing.event(tracing.DB_WRITE, perf_counter_ns() - t0)
+
+RESULT_EXPORT_HEADER = ("id", "created_at", "wpm", "accuracy", "duration", "weak_keys_json")
+
+def _result_filter(user_id, min_wpm=None, min_accuracy=None):
+    where = ["user_id = ?"]
+    args = [user_id]
+    if min_wpm is not None:
+        where.append("wpm >= ?")
+        args.append(min_wpm)
+    if min_accuracy is not None:
+        where.append("accuracy >= ?")
+        args.append(min_accuracy)
+    return where, args
+
+def fetch_results_page(user_id: int, sort: str = "created_at", descending: bool = True,
+                       after=None, limit: int = 200, min_wpm=None, min_accuracy=None,
+                       offset: int = 0):
+    """
+    One page of a user's results using keyset pagination.
+
+    after: (sort_value, id) of the last row of the previous page, or None
+    for the first page. Rows are (id, sort_value, epoch_seconds, wpm,
+    accuracy, duration); pass the last row's [1], [0] back as `after`.
+    Paging backwards is the same call with `descending` flipped and the
+    first row's key as `after`. offset skips rows past `after` (a jump
+    from the nearest known key; it costs a scan of the skipped index range).
+    """
+    if sort not in RESULT_SORT_COLUMNS:
+        raise DatabaseError(f"cannot sort results by {sort!r}")
+    where, args = _result_filter(user_id, min_wpm, min_accuracy)
+    key = _sort_key(sort)
+    if after is not None:
+        where.append(f"({key}, id) {'<' if descending else '>'} (?, ?)")
+        args.extend(after)
+    direction = "DESC" if descending else "ASC"
+    sql = (
+        f"SELECT id, {key}, CAST(strftime('%s', created_at) AS INTEGER), wpm, accuracy, duration "
+        f"FROM results WHERE {' AND '.join(where)} "
+        f"ORDER BY {key} {direction}, id {direction} LIMIT ? OFFSET ?"
+    )
+    args.extend((limit, offset))
+    try:
+        conn = get_conn()
+        return conn.execute(sql, args).fetchall()
+    except Exception as e:
+        raise DatabaseError(str(e))
+    finally:
+        conn.close()
+
+def count_results(user_id: int, min_wpm=None, min_accuracy=None) -> int:
+    where, args = _result_filter(user_id, min_wpm, min_accuracy)
+    try:
+        conn = get_conn()
+        return conn.execute(f"SELECT COUNT(*) FROM results WHERE {' AND '.join(where)}", args).fetchone()[0]
+    except Exception as e:
+        raise DatabaseError(str(e))
+    finally:
+        conn.close()
+
+def iter_results(user_id: int, min_wpm=None, min_accuracy=None, batch: int = 1000):
+    """
+    Yield RESULT_EXPORT_HEADER rows oldest first, one fetchmany batch in
+    memory at a time. Opens its own connection, so it can be consumed on a
+    worker thread.
+    """
+    where, args = _result_filter(user_id, min_wpm, min_accuracy)
+    sql = (
+        f"SELECT {', '.join(RESULT_EXPORT_HEADER)} FROM results "
+        f"WHERE {' AND '.join(where)} ORDER BY {_sort_key('created_at')}, id"
+    )
+    try:
+        conn = get_conn()
+        cur = conn.execute(sql, args)
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            yield from rows
+    except sqlite3.Error as e:
+        raise DatabaseError(str(e))
+    finally:
+        conn.close()
+
+# ---- bulk re-scoring (services/rescore.py) ----
+def has_unlinked_results(conn) -> bool:
+    return conn.execute("SELECT 1 FROM results WHERE trace_path IS NULL LIMIT 1").fetchone() is not None
+
+def link_traces(conn, headers) -> int:
+    """
+    Fill in trace_path for results saved before the column existed.
+
+    headers: iterable of (path, duration, wpm) from trace headers. A trace
+    stores the exact duration and WPM that were inserted with its result,
+    so unlinked rows are matched on that pair (ties in file-name order,
+    which is the order the traces were written). Rows with no matching
+    trace get '' so later runs do not look for them again.
+    """
+    linked = {row[0] for row in conn.execute("SELECT trace_path FROM results WHERE trace_path <> ''")}
+    by_score = {}
+    for path, duration, wpm in sorted(headers):
+        if str(path) not in linked:
+            by_score.setdefault((duration, wpm), []).append(str(path))
+    updates = []
+    for rid, duration, wpm in conn.execute(
+        "SELECT id, duration, wpm FROM results WHERE trace_path IS NULL ORDER BY id"
+    ):
+        paths = by_score.get((duration, wpm))
+        updates.append((paths.pop(0) if paths else "", rid))
+    with conn:
+        conn.executemany("UPDATE results SET trace_path = ? WHERE id = ?", updates)
+    return sum(1 for path, _ in updates if path)
+
+def count_stale_scores(conn, version: int = SCORE_VERSION) -> int:
+    return conn.execute(
+        "SELECT COUNT(*) FROM results WHERE trace_path <> '' AND score_version < ?", (version,)
+    ).fetchone()[0]
+
+def iter_stale_scores(conn, version: int = SCORE_VERSION, batch: int = 1000):
+    """
+    Yield (id, trace_path) of results scored with an older version, in id
+    order. Reads by keyset so rows updated meanwhile are not revisited.
+    """
+    last = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, trace_path FROM results "
+            "WHERE id > ? AND trace_path <> '' AND score_version < ? ORDER BY id LIMIT ?",
+            (last, version, batch),
+        ).fetchall()
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+
+def apply_scores(conn, rows, version: int = SCORE_VERSION):
+    """rows: (id, wpm, accuracy, duration); written in one transaction."""
+    with conn:
+        conn.executemany(
+            "UPDATE results SET wpm = ?, accuracy = ?, duration = ?, score_version = ? WHERE id = ?",
+            [(wpm, acc, dur, version, rid) for rid, wpm, acc, dur in rows],
+        )
@@ -0,0 +1,132 @@
+# typecore/text_profile.py
+"""
+One-pass structural profile of a target text, shared by every renderer.
+
+The profile records the code/prose classification, word boundaries, line
+starts and whitespace runs, so caret-relative questions ("where does the
+current word start?", "which line is this?") are bisect lookups instead of
+character walks on every render. Profiles are memoized by content hash.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import re
+
+_RUNS = re.compile(r"(\S+)|(\s+)")
+_CODE_PREFIXES = ("def ", "class ", "function ", "import ", "from ", "const ", "let ", "var ")
+
+_CACHE_SIZE = 32
+_cache: "OrderedDict[bytes, TextProfile]" = OrderedDict()
+_last: tuple = (None, None)
+
+
+@dataclass(frozen=True)
+class TextProfile:
+    length: int
+    is_code: bool
+    word_starts: array
+    word_ends: array
+    line_starts: array
+    space_starts: array
+    space_ends: array
+
+    def _word_at(self, i: int) -> int:
+        """Index of the word containing char i, or -1."""
+        k = bisect_right(self.word_starts, i) - 1
+        if k >= 0 and self.word_ends[k] > i:
+            return k
+        return -1
+
+    def word_start(self, pos: int) -> int:
+        """Start of the word that ends at or runs through pos (pos if none)."""
+        pos = max(0, min(pos, self.length))
+        k = self._word_at(pos - 1)
+        return self.word_starts[k] if k >= 0 else pos
+
+    def word_end(self, pos: int) -> int:
+        """End of the word containing pos (pos if it is whitespace)."""
+        pos = max(0, min(pos, self.length))
+        k = self._word_at(pos)
+        return self.word_ends[k] if k >= 0 else pos
+
+    def snap_to_prev_space(self, pos: int, limit: int = 40) -> int:
+        """Walk back to the start of the current word, at most `limit` chars."""
+        pos = max(0, min(pos, self.length))
+        return max(self.word_start(pos), pos - limit)
+
+    def line_of(self, pos: int) -> int:
+        return max(0, bisect_right(self.line_starts, pos) - 1)
+
+    def line_col(self, pos: int) -> tuple[int, int]:
+        line = self.line_of(pos)
+        return line, pos - self.line_starts[line]
+
+
+def _build(text: str) -> TextProfile:
+    word_starts, word_ends = array("i"), array("i")
+    space_starts, space_ends = array("i"), array("i")
+    line_starts = array("i", [0])
+
+    # code heuristics, evaluated per line as the scan crosses each newline
+    indent_hit = False      # a line indented with a tab / 4 spaces
+    code_marker = False     # keyword prefix, braces or arrow (needs >1 line)
+    indented_lines = 0
+
+    def check_line(ln: str):
+        nonlocal indent_hit, code_marker, indented_lines
+        if ln.startswith("\t") or ln.startswith("    "):
+            indent_hit = True
+        stripped = ln.lstrip()
+        if stripped.startswith(_CODE_PREFIXES) or "{" in ln or "}" in ln or "=>" in ln:
+            code_marker = True
+        if len(ln) - len(stripped) >= 2:
+            indented_lines += 1
+
+    for m in _RUNS.finditer(text):
+        a, b = m.span()
+        if m.group(1) is not None:
+            word_starts.append(a)
+            word_ends.append(b)
+            continue
+        space_starts.append(a)
+        space_ends.append(b)
+        nl = text.find("\n", a, b)
+        while nl != -1:
+            check_line(text[line_starts[-1]:nl])
+            line_starts.append(nl + 1)
+            nl = text.find("\n", nl + 1, b)
+
+    n = len(text)
+    if line_starts[-1] < n:
+        check_line(text[line_starts[-1]:])
+    # same line count as str.splitlines() (a trailing newline adds no line)
+    n_lines = len(line_starts) - (1 if line_starts[-1] == n else 0) if n else 0
+
+    is_code = bool(n) and (
+        indent_hit
+        or (code_marker and n_lines > 1)
+        or (n_lines >= 3 and indented_lines >= max(1, n_lines // 6))
+    )
+    return TextProfile(n, is_code, word_starts, word_ends, line_starts, space_starts, space_ends)
+
+
+def profile_for(text: str) -> TextProfile:
+    """Profile of `text`, computed once per distinct content."""
+    global _last
+    text = text or ""
+    if _last[0] is text:
+        return _last[1]
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    prof = _cache.get(key)
+    if prof is None:
+        prof = _build(text)
+        _cache[key] = prof
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    _last = (text, prof)
+    return prof
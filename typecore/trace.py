@@ -0,0 +1,257 @@
+# typecore/trace.py
+"""
+Compact binary keystroke traces.
+
+File layout (little endian):
+  header  48 bytes  magic, version, flags, record count, text digest,
+                    started_at, duration, wpm, accuracy
+  records 12 bytes  dt_us:u32, key:u32, expected:u32   (one per keystroke)
+
+Records are fixed width so a trace can be mapped straight into a NumPy
+structured array without parsing or copying.
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import itertools
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from typecore.errors import TraceError
+
+TRACE_DIR = Path("data/traces")
+TRACE_SUFFIX = ".tmt"
+MAGIC = b"TMTR"
+VERSION = 1
+
+# key codepoint stored for a backspace keystroke
+BACKSPACE = 0x08
+
+_HEADER = struct.Struct("<4sHHI8sdddf")
+_RECORD = struct.Struct("<III")
+RECORD_DTYPE = np.dtype([("dt", "<u4"), ("key", "<u4"), ("expected", "<u4")])
+
+_U32_MAX = 0xFFFFFFFF
+
+
+@dataclass
+class TraceHeader:
+    version: int
+    count: int
+    digest: bytes
+    started_at: float
+    duration: float
+    wpm: float
+    accuracy: float
+
+
+def text_digest(text: str) -> bytes:
+    """8-byte fingerprint of the target text, used to match traces to passages."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=8).digest()
+
+
+def key_codepoint(key: str) -> int:
+    if not key:
+        return 0
+    if key == "<BACKSPACE>":
+        return BACKSPACE
+    return ord(key[0])
+
+
+def new_trace_path() -> Path:
+    """
+    A path no other writer has, reserved by creating the file empty. Names
+    still sort by time; the pid and a retry counter keep traces started in
+    the same millisecond (other processes, a recovered-session save) apart.
+    """
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+    base = f"{stamp}-{int(now * 1000) % 1000:03d}-{os.getpid()}"
+    for n in itertools.count():
+        path = TRACE_DIR / f"{base}{f'-{n}' if n else ''}{TRACE_SUFFIX}"
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            continue
+        return path
+
+
+class TraceRecorder:
+    """Collects keystrokes for the running test; flushed to disk at session end."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._buf = array("I")
+        self._last_us = 0
+
+    def __len__(self) -> int:
+        return len(self._buf) // 3
+
+    def record(self, t: float, key: str, expected: str = "") -> int:
+        """t is active session time in seconds. Returns the delta in microseconds."""
+        us = int(t * 1_000_000)
+        dt = min(max(0, us - self._last_us), _U32_MAX)
+        self._last_us = max(self._last_us, us)
+        self._buf.extend((dt, key_codepoint(key), key_codepoint(expected)))
+        return dt
+
+    def records(self) -> np.ndarray:
+        # copy: a live view would pin the array and block further appends
+        return np.frombuffer(self._buf.tobytes(), dtype=RECORD_DTYPE)
+
+
+class TraceWriter:
+    """
+    Streaming writer. Records can be appended one at a time or in blocks;
+    the header count and result fields are patched in on close().
+    """
+
+    def __init__(self, path, text: str = "", started_at: float | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._digest = text_digest(text)
+        self._started_at = started_at if started_at is not None else time.time()
+        self._count = 0
+        self._result = (0.0, 0.0, 0.0)
+        self._f = open(self.path, "wb")
+        self._f.write(self._pack_header())
+
+    def _pack_header(self) -> bytes:
+        duration, wpm, accuracy = self._result
+        return _HEADER.pack(
+            MAGIC, VERSION, 0, self._count, self._digest,
+            self._started_at, duration, wpm, accuracy,
+        )
+
+    def append(self, dt_us: int, key: int, expected: int):
+        self._f.write(_RECORD.pack(min(dt_us, _U32_MAX), key, expected))
+        self._count += 1
+
+    def write(self, records: np.ndarray):
+        arr = np.ascontiguousarray(records, dtype=RECORD_DTYPE)
+        self._f.write(arr.tobytes())
+        self._count += len(arr)
+
+    def set_result(self, duration: float, wpm: float, accuracy: float):
+        self._result = (float(duration), float(wpm), float(accuracy))
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.seek(0)
+        self._f.write(self._pack_header())
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_header(buf: bytes) -> TraceHeader:
+    if len(buf) < _HEADER.size:
+        raise TraceError("Trace file is truncated")
+    magic, version, _flags, count, digest, started, duration, wpm, acc = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise TraceError("Not a keystroke trace")
+    if version != VERSION:
+        raise TraceError(f"Unsupported trace version {version}")
+    return TraceHeader(version, count, digest, started, duration, wpm, acc)
+
+
+def read_header(path) -> TraceHeader:
+    """Read only the fixed header (cheap; used to scan a trace directory)."""
+    with open(path, "rb") as f:
+        return _parse_header(f.read(_HEADER.size))
+
+
+class TraceReader:
+    """
+    Zero-copy reader: `records` is a NumPy view straight onto the mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise TraceError(str(e))
+        self.header = _parse_header(self._mm[:_HEADER.size])
+        available = (len(self._mm) - _HEADER.size) // RECORD_DTYPE.itemsize
+        self.count = min(self.header.count, available)
+        self.records = np.frombuffer(
+            self._mm, dtype=RECORD_DTYPE, count=self.count, offset=_HEADER.size
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __reduce__(self):
+        # a mapping cannot cross a process boundary; the worker maps the file itself
+        return (type(self), (str(self.path),))
+
+    def timestamps(self) -> np.ndarray:
+        """Cumulative keystroke times in seconds from session start."""
+        return np.cumsum(self.records["dt"], dtype=np.int64) / 1_000_000.0
+
+    def close(self):
+        self.records = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # a caller still holds a view; the map is released with it
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+KEYSTROKE_HEADER = ("session", "t_ms", "key", "expected")
+
+
+def _key_label(cp: int) -> str:
+    if cp == BACKSPACE:
+        return "<BACKSPACE>"
+    return chr(cp) if cp else ""
+
+
+def iter_keystrokes(directory=TRACE_DIR, chunk: int = 65536):
+    """
+    Yield (session, t_ms, key, expected) for every keystroke of every trace
+    in `directory`, oldest session first. Traces are mapped and converted a
+    chunk at a time, so memory stays flat however many keystrokes exist.
+    """
+    for path in sorted(Path(directory).glob(f"*{TRACE_SUFFIX}")):
+        try:
+            reader = TraceReader(path)
+        except (OSError, TraceError):
+            continue
+        try:
+            session = path.stem
+            base_us = 0
+            for start in range(0, reader.count, chunk):
+                block = reader.records[start:start + chunk]
+                t_us = base_us + np.cumsum(block["dt"], dtype=np.int64)
+                base_us = int(t_us[-1])
+                t_ms = (t_us // 1000).tolist()
+                keys = block["key"].tolist()
+                expected = block["expected"].tolist()
+                del block
+                for t, k, e in zip(t_ms, keys, expected):
+                    yield session, t, _key_label(k), _key_label(e)
+        finally:
+            reader.close()
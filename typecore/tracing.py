@@ -0,0 +1,95 @@
+# typecore/tracing.py
+"""
+Hot-path event tracing into a preallocated ring buffer.
+
+Recording an event is a clock read and three stores into preallocated
+slots: no locking and no I/O. The buffer keeps the
+last CAPACITY events, and the crash handler in main.py dumps them next
+to the traceback.
+
+  tracing.event(tracing.KEY, ord(ch))
+  t0 = perf_counter_ns(); ...; tracing.event(tracing.RENDER, perf_counter_ns() - t0)
+
+Set TYPEMASTER_TRACE=0 to turn it off; event() is then a no-op.
+"""
+from __future__ import annotations
+from time import perf_counter_ns
+from typing import List
+import itertools
+import os
+
+# event kinds; the value recorded with each is noted
+KEY = 1          # key received: codepoint (8 = backspace)
+RENDER = 2       # typing area rendered: duration ns
+DB_WRITE = 3     # result saved: duration ns
+TIMER_TICK = 4   # session timer tick: active ms
+
+NAMES = {KEY: "key", RENDER: "render", DB_WRITE: "db_write", TIMER_TICK: "timer_tick"}
+
+CAPACITY = 4096  # power of two
+
+
+class Tracer:
+    """
+    Fixed-size ring of events in three preallocated columns. Slots come
+    from an itertools counter, so events from worker threads each get
+    their own slot without a lock.
+    """
+
+    def __init__(self, capacity: int = CAPACITY):
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        # plain lists: storing into one is far cheaper than into an array
+        self._ts = [0] * capacity
+        self._kind = [0] * capacity
+        self._value = [0] * capacity
+        self.event = self._make_event()
+
+    def _make_event(self):
+        # defaults bind everything locally: a counter bump, a clock read, three stores
+        def event(kind: int, value: int = 0, _ts=self._ts, _kind=self._kind, _value=self._value,
+                  _next=itertools.count().__next__, _now=perf_counter_ns, _mask=self.capacity - 1):
+            i = _next() & _mask
+            _ts[i] = _now()
+            _kind[i] = kind
+            _value[i] = value
+        return event
+
+    def recent(self, n: int = 200) -> List[tuple]:
+        """Last n events, oldest first, as (ts_ns, kind, value)."""
+        events = sorted(e for e in zip(self._ts, self._kind, self._value) if e[0])
+        return events[-n:] if n else []
+
+    def dump(self, n: int = 200) -> List[str]:
+        """Readable lines for the last n events, timed relative to the newest."""
+        events = self.recent(n)
+        if not events:
+            return []
+        end = events[-1][0]
+        lines = []
+        for ts, kind, value in events:
+            name = NAMES.get(kind, str(kind))
+            if kind == KEY:
+                detail = "<BACKSPACE>" if value == 8 else repr(chr(value)) if value else ""
+            elif kind in (RENDER, DB_WRITE):
+                detail = f"{value / 1e6:.3f} ms"
+            else:
+                detail = str(value)
+            lines.append(f"{(ts - end) / 1e6:+12.3f} ms  {name:<10} {detail}")
+        return lines
+
+
+tracer = Tracer()
+
+
+def _noop(kind: int, value: int = 0):
+    pass
+
+
+ENABLED = os.environ.get("TYPEMASTER_TRACE", "1") != "0"
+event = tracer.event if ENABLED else _noop
+
+
+def dump(n: int = 200) -> List[str]:
+    return tracer.dump(n)
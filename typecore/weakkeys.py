@@ -0,0 +1,61 @@
+# typecore/weakkeys.py
+from collections import Counter
+
+from typecore.ngrams import NgramMiner
+
+class WeakKeys:
+    def __init__(self):
+        self.counts = Counter()
+        self.ngrams = NgramMiner()
+
+    def note(self, ch: str, correct: bool, latency_ms: float | None = None, expected: str = ""):
+        if not ch:
+            return
+        key = ch.lower()
+        # increment “weakness” on mistakes more than on correct
+        self.counts[key] += 2 if not correct else 0.5
+        # n-gram timing is keyed on what should have been typed
+        if latency_ms is not None and expected:
+            self.ngrams.update(expected, latency_ms, not correct)
+
+    def note_records(self, records):
+        """
+        Score a block of trace records at once (restoring a journaled
+        session); same weights as note(), without the n-gram timing.
+        """
+        import numpy as np
+        from typecore.trace import BACKSPACE
+
+        rec = records[records["key"] != BACKSPACE]
+        if not len(rec):
+            return
+        weight = np.where(rec["key"] == rec["expected"], 0.5, 2.0)
+        keys, inverse = np.unique(rec["key"], return_inverse=True)
+        totals = np.bincount(inverse, weights=weight)
+        for cp, total in zip(keys.tolist(), totals.tolist()):
+            if cp:
+                self.counts[chr(cp).lower()] += total
+
+    def break_sequence(self):
+        """Backspace / new session: the next key starts a fresh n-gram chain."""
+        self.ngrams.reset_context()
+
+    def take_ngrams(self) -> NgramMiner:
+        """Hand over this session's n-gram stats and start a fresh miner."""
+        miner, self.ngrams = self.ngrams, NgramMiner()
+        return miner
+
+    def snapshot(self) -> dict:
+        return dict(self.counts)
+
+    def ranked(self) -> list:
+        """(key, miss_rate, hits, misses) rows, most-missed first."""
+        ranked = []
+        for key, score in self.counts.items():
+            hits = max(1, int(score))
+            miss = int(score // 2)
+            attempts = hits + miss
+            miss_rate = miss / attempts if attempts else 0
+            ranked.append((key, miss_rate, hits, miss))
+        ranked.sort(key=lambda r: r[1], reverse=True)
+        return ranked
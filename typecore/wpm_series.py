@@ -0,0 +1,120 @@
+# typecore/wpm_series.py
+"""
+Bounded multi-resolution time series for WPM samples.
+
+Recent samples are kept at full resolution; older ones cascade into
+coarser levels whose buckets keep (time, min, mean, max) of `factor`
+buckets from the level below. The coarsest level halves its own
+resolution when it fills, so a session of any length keeps a complete
+curve in fixed memory.
+
+With the defaults (10 Hz samples, 1024 x 4 levels, factor 8) the full
+resolution covers the last ~100 s and an eight-hour session still fits
+before any compaction of the coarsest level happens.
+"""
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+_T, _MIN, _MEAN, _MAX, _N = range(5)
+
+
+class _Level:
+    """Fixed ring of buckets; columns t, min, mean, max, n (raw samples)."""
+
+    def __init__(self, capacity: int):
+        self.cap = capacity
+        self.data = np.zeros((5, capacity), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def push(self, t, vmin, vmean, vmax, n):
+        i = (self.head + self.size) % self.cap
+        d = self.data
+        d[_T, i], d[_MIN, i], d[_MEAN, i], d[_MAX, i], d[_N, i] = t, vmin, vmean, vmax, n
+        self.size += 1
+
+    def pop_bucket(self, factor: int):
+        """Aggregate the `factor` oldest entries into one bucket and drop them."""
+        # head only ever moves in steps of `factor` and cap % factor == 0,
+        # so this slice never wraps around the ring
+        sl = slice(self.head, self.head + factor)
+        d = self.data
+        n = d[_N, sl]
+        total = n.sum()
+        bucket = (
+            float((d[_T, sl] * n).sum() / total),
+            float(d[_MIN, sl].min()),
+            float((d[_MEAN, sl] * n).sum() / total),
+            float(d[_MAX, sl].max()),
+            float(total),
+        )
+        self.head = (self.head + factor) % self.cap
+        self.size -= factor
+        return bucket
+
+    def ordered(self) -> np.ndarray:
+        idx = (self.head + np.arange(self.size)) % self.cap
+        return self.data[:, idx]
+
+    def halve(self):
+        """Merge neighbouring pairs in place (coarsest level only)."""
+        d = self.ordered()
+        m = d.shape[1] // 2 * 2
+        a, b = d[:, 0:m:2], d[:, 1:m:2]
+        n = a[_N] + b[_N]
+        merged = np.empty((5, m // 2))
+        merged[_T] = (a[_T] * a[_N] + b[_T] * b[_N]) / n
+        merged[_MIN] = np.minimum(a[_MIN], b[_MIN])
+        merged[_MEAN] = (a[_MEAN] * a[_N] + b[_MEAN] * b[_N]) / n
+        merged[_MAX] = np.maximum(a[_MAX], b[_MAX])
+        merged[_N] = n
+        if m < d.shape[1]:
+            merged = np.concatenate([merged, d[:, m:]], axis=1)
+        self.data[:, :merged.shape[1]] = merged
+        self.head = 0
+        self.size = merged.shape[1]
+
+
+class MultiResSeries:
+    def __init__(self, capacity: int = 1024, factor: int = 8, levels: int = 4):
+        if capacity % factor:
+            raise ValueError("capacity must be a multiple of factor")
+        self.factor = factor
+        self._levels = [_Level(capacity) for _ in range(levels)]
+
+    def clear(self):
+        for lvl in self._levels:
+            lvl.head = 0
+            lvl.size = 0
+
+    def __len__(self) -> int:
+        return sum(lvl.size for lvl in self._levels)
+
+    def append(self, t: float, v: float):
+        self._levels[0].push(t, v, v, v, 1.0)
+        for i, lvl in enumerate(self._levels):
+            if lvl.size < lvl.cap:
+                break
+            if i + 1 == len(self._levels):
+                lvl.halve()
+            else:
+                self._levels[i + 1].push(*lvl.pop_bucket(self.factor))
+
+    def _stack(self) -> np.ndarray:
+        # coarsest (oldest) level first
+        parts = [lvl.ordered() for lvl in reversed(self._levels) if lvl.size]
+        if not parts:
+            return np.empty((5, 0))
+        return np.concatenate(parts, axis=1)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, mean values) of the whole session, oldest first."""
+        d = self._stack()
+        return d[_T], d[_MEAN]
+
+    def envelope(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(times, min, max) per bucket; equal to the value at full resolution."""
+        d = self._stack()
+        return d[_T], d[_MIN], d[_MAX]
@@ -0,0 +1,272 @@
+# ui/history_window.py
+"""
+Session history browser.
+
+The model reports every matching session as a row but holds only a small
+window of pages: a page is read from SQLite when the view first paints
+one of its rows, and the least recently used pages are dropped once more
+than MAX_PAGES are loaded, so memory stays constant however long the
+history is. Pages are fetched with keyset pagination, each one anchored
+on the (sort key, id) bounds of the nearest page already seen, so
+scrolling either way is one indexed range scan; a jump (dragging the
+scroll bar) skips from the nearest known bound or either end. Sorting
+and filtering are pushed down into the query; loaded rows are kept in
+compact typed columns rather than Python row tuples.
+"""
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QSpinBox,
+    QTableView,
+    QVBoxLayout,
+)
+
+from typecore.errors import DatabaseError
+from typecore.trace import KEYSTROKE_HEADER, iter_keystrokes
+from typecore.storage import (
+    RESULT_EXPORT_HEADER,
+    RESULT_SORT_COLUMNS,
+    count_results,
+    fetch_results_page,
+    iter_results,
+)
+from ui.widgets.export_progress import start_export
+
+PAGE_SIZE = 200
+MAX_PAGES = 8           # loaded pages (rows ~32 bytes each); a screen spans two at most
+MAX_BOUNDS = 1024       # remembered page bounds, the anchors for refetching
+
+# looked up once: a Qt enum attribute access costs microseconds, and data()
+# runs for every role of every visible cell on each scroll step
+_DISPLAY = Qt.DisplayRole
+_ALIGNMENT = Qt.TextAlignmentRole
+_ALIGN_RIGHT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+class _Page:
+    __slots__ = ("epoch", "wpm", "acc", "dur")
+
+    def __init__(self, rows=()):
+        self.epoch = array("q", (r[2] or 0 for r in rows))
+        self.wpm = array("d", (r[3] or 0.0 for r in rows))
+        self.acc = array("d", (r[4] or 0.0 for r in rows))
+        self.dur = array("d", (r[5] or 0.0 for r in rows))
+
+
+class HistoryModel(QAbstractTableModel):
+    HEADERS = ["Date", "WPM", "Accuracy", "Duration"]
+
+    def __init__(self, user_id: int, parent=None):
+        super().__init__(parent)
+        self.user_id = user_id
+        self._sort = "created_at"
+        self._descending = True
+        self._min_wpm = None
+        self._min_accuracy = None
+        self._clear()
+
+    def _clear(self):
+        self._total = 0
+        self._pages: "OrderedDict[int, _Page]" = OrderedDict()
+        # page -> ((sort key, id) of its first row, same of its last row)
+        self._bounds: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def reload(self):
+        """Count the matching sessions again and drop every loaded page."""
+        self.beginResetModel()
+        self._clear()
+        try:
+            self._total = count_results(self.user_id, self._min_wpm, self._min_accuracy)
+        except DatabaseError as e:
+            print("History count failed:", e)
+        self.endResetModel()
+
+    def set_filter(self, min_wpm=None, min_accuracy=None):
+        self._min_wpm = min_wpm
+        self._min_accuracy = min_accuracy
+        self.reload()
+
+    def filters(self):
+        return self._min_wpm, self._min_accuracy
+
+    def total(self) -> int:
+        """Matching sessions as of the last reload()."""
+        return self._total
+
+    # ---- page window ----
+    def _page(self, p: int) -> _Page:
+        page = self._pages.get(p)
+        if page is not None:
+            self._pages.move_to_end(p)
+            return page
+        page = self._load(p)
+        self._pages[p] = page
+        if len(self._pages) > MAX_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def _load(self, p: int) -> _Page:
+        first = p * PAGE_SIZE
+        n = min(PAGE_SIZE, self._total - first)
+        # nearest anchor: either end of the table, or a page whose bounds
+        # are known; (rows to skip, key, backwards)
+        anchors = [(first, None, False), (self._total - first - n, None, True)]
+        for q, (head, tail) in self._bounds.items():
+            if q < p:
+                anchors.append(((p - q - 1) * PAGE_SIZE, tail, False))
+            elif q > p:
+                anchors.append(((q - p - 1) * PAGE_SIZE, head, True))
+        skip, after, backwards = min(anchors, key=lambda a: a[0])
+        try:
+            rows = fetch_results_page(
+                self.user_id, self._sort, self._descending != backwards, after,
+                n, self._min_wpm, self._min_accuracy, skip,
+            )
+        except DatabaseError as e:
+            print("History fetch failed:", e)
+            return _Page()
+        if backwards:
+            rows.reverse()
+        # short only if results changed since the count; the rows no longer
+        # line up with the page, so they are not used as an anchor
+        if len(rows) == n and rows:
+            self._bounds[p] = ((rows[0][1], rows[0][0]), (rows[-1][1], rows[-1][0]))
+            if len(self._bounds) > MAX_BOUNDS:
+                self._bounds.popitem(last=False)
+        return _Page(rows)
+
+    # ---- QAbstractTableModel ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._total
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=_DISPLAY):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if role == _ALIGNMENT and c > 0:
+            return _ALIGN_RIGHT
+        if role != _DISPLAY:
+            return None
+        page = self._page(r // PAGE_SIZE)
+        r %= PAGE_SIZE
+        if r >= len(page.wpm):
+            return None
+        if c == 0:
+            # created_at is stored in UTC; show local time
+            return datetime.fromtimestamp(page.epoch[r]).strftime("%Y-%m-%d %H:%M")
+        if c == 1:
+            return f"{page.wpm[r]:.1f}"
+        if c == 2:
+            return f"{page.acc[r]:.1f}%"
+        return f"{page.dur[r]:.0f}s"
+
+    def headerData(self, section, orientation, role=_DISPLAY):
+        if role != _DISPLAY:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            column, order = 0, Qt.DescendingOrder
+        sort, descending = RESULT_SORT_COLUMNS[column], order == Qt.DescendingOrder
+        if (sort, descending) == (self._sort, self._descending):
+            # e.g. setSortingEnabled() re-applying the current order; the
+            # rows are already in it (refresh() is what reloads them)
+            return
+        self._sort, self._descending = sort, descending
+        self.reload()
+
+
+class HistoryWindow(QDialog):
+    def __init__(self, user_id: int, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Session History")
+        self.resize(620, 560)
+
+        root = QVBoxLayout(self)
+
+        ctrl = QHBoxLayout()
+        ctrl.addWidget(QLabel("Min WPM:"))
+        self.min_wpm = QSpinBox()
+        self.min_wpm.setRange(0, 400)
+        self.min_wpm.valueChanged.connect(self._apply_filter)
+        ctrl.addWidget(self.min_wpm)
+        ctrl.addWidget(QLabel("Min accuracy %:"))
+        self.min_acc = QSpinBox()
+        self.min_acc.setRange(0, 100)
+        self.min_acc.valueChanged.connect(self._apply_filter)
+        ctrl.addWidget(self.min_acc)
+        ctrl.addStretch(1)
+        self.lbl_count = QLabel()
+        ctrl.addWidget(self.lbl_count)
+        root.addLayout(ctrl)
+
+        self.model = HistoryModel(user_id, self)
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        # fixed row height keeps scrolling independent of the row count
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        # matches the model's initial order, so enabling sorting does not
+        # query; the first load is the caller's refresh()
+        self.view.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.view.setSortingEnabled(True)
+        root.addWidget(self.view, stretch=1)
+
+        buttons = QHBoxLayout()
+        btn_sessions = QPushButton("Export sessions…", self)
+        btn_sessions.clicked.connect(self._export_sessions)
+        buttons.addWidget(btn_sessions)
+        btn_keys = QPushButton("Export keystrokes…", self)
+        btn_keys.clicked.connect(self._export_keystrokes)
+        buttons.addWidget(btn_keys)
+        buttons.addStretch(1)
+        btn = QPushButton("Close", self)
+        btn.clicked.connect(self.accept)
+        buttons.addWidget(btn)
+        root.addLayout(buttons)
+
+    def refresh(self):
+        """Reload from the database (e.g. after new results were saved)."""
+        self.model.reload()
+        self._update_count()
+
+    def _apply_filter(self):
+        self.model.set_filter(
+            self.min_wpm.value() or None,
+            self.min_acc.value() or None,
+        )
+        self._update_count()
+
+    def _update_count(self):
+        self.lbl_count.setText(f"{self.model.total()} sessions")
+
+    def _export_sessions(self):
+        """All sessions matching the current filter, not just the loaded rows."""
+        m = self.model
+        user_id = m.user_id
+        min_wpm, min_acc = m.filters()
+        return start_export(
+            self, "Export Sessions", "sessions.csv",
+            lambda: iter_results(user_id, min_wpm, min_acc),
+            RESULT_EXPORT_HEADER, total=m.total(),
+        )
+
+    def _export_keystrokes(self):
+        return start_export(self, "Export Keystrokes", "keystrokes.csv.gz", iter_keystrokes, KEYSTROKE_HEADER)
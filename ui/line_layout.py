@@ -0,0 +1,55 @@
+# ui/line_layout.py
+"""
+Real line breaks for the prose view.
+
+Lines are laid out once with QTextLayout for a given (text, width, font)
+and cached, so the view can render exactly the lines on screen and find
+the caret's line with a bisect instead of guessing from a character count.
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from PySide6.QtGui import QFont, QTextLayout, QTextOption
+
+_CACHE_SIZE = 16
+_cache: "OrderedDict[tuple, array]" = OrderedDict()
+
+
+def line_starts(text: str, font: QFont, width: float) -> array:
+    """Char offset where each wrapped line begins (always at least [0])."""
+    # str caches its own hash, so this key is cheap on repeated renders;
+    # a hit compares the text itself, so colliding hashes cannot mix up entries
+    key = (text, int(width), font.key())
+    starts = _cache.get(key)
+    if starts is not None:
+        _cache.move_to_end(key)
+        return starts
+
+    # newlines render as spaces in the prose view; same length keeps offsets valid
+    layout = QTextLayout(text.replace("\n", " "), font)
+    opt = QTextOption()
+    opt.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+    layout.setTextOption(opt)
+
+    starts = array("i")
+    layout.beginLayout()
+    while True:
+        line = layout.createLine()
+        if not line.isValid():
+            break
+        line.setLineWidth(max(1.0, float(width)))
+        starts.append(line.textStart())
+    layout.endLayout()
+    if not starts:
+        starts.append(0)
+
+    _cache[key] = starts
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return starts
+
+
+def line_index(starts: array, pos: int) -> int:
+    return max(0, bisect_right(starts, pos) - 1)
@@ -1,21 +1,29 @@
 # ui/main_window.py
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QMenu, QFileDialog, QMessageBox,
+    QMenu, QFileDialog, QMessageBox, QInputDialog,
     QToolButton, QPushButton
 )
-from PySide6.QtGui import QAction
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction, QActionGroup
+from PySide6.QtCore import Qt, QTimer
 import json
-import pathlib, random
 
 from ui.test_ui import TestUI
 from ui.weakkeys_dialog import WeakKeysDialog
+from ui.history_window import HistoryWindow
 from ui.widgets.session_dialog import SessionDialog
+from typecore.keytiming import analyze as analyze_timing
+from typecore.ngrams import NgramMiner, history_path
+from typecore.drill import corpus_index
+from typecore import corpus, scoring
+from typecore.journal import recover
 from app.themes import THEMES, DEFAULT_THEME_INDEX, load_custom_themes
 from utils.file_handler import load_default_text
-from utils.db_helper import upsert_user, insert_result
+from typecore.storage import upsert_user, insert_result
 from core.threads import TextLoadWorker, Workers
+from core.race_client import RaceClient
+from core import sound
+from utils.sfx import KEY_SOUNDS
 
 
 class MainWindow(QMainWindow):
@@ -24,6 +32,18 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Typemaster")
         self.resize(1200, 720)
         self.user_id = upsert_user("guest")
+        self.ngram_history = self._load_ngram_history()
+        # Weak Keys / History dialogs are built on first open and reused
+        self._weak_dlg = None
+        self._history_dlg = None
+        # LAN race (None when not in a race)
+        self._race = None
+        self._race_finish_sent = False
+        self._race_tick = QTimer(self)
+        self._race_tick.setInterval(50)
+        self._race_tick.timeout.connect(self._on_race_tick)
+        # keystroke sounds; the engine (and its audio thread) starts on first use
+        self._sound = None
         load_custom_themes()
         self.theme_idx = DEFAULT_THEME_INDEX
         self._waiting_for_autostart = False
@@ -40,6 +60,12 @@ class MainWindow(QMainWindow):
         self.test.set_text(paragraph_text)
         self.test.configure_session(time_limit=30)
         self.test.current_text = paragraph_text
+        # a test left unfinished by a crash; offered once the window is up
+        self._recovered = None
+        try:
+            self._recovered = recover()
+        except Exception as e:
+            print(f"Journal recovery error: {e}")
 
         # Connect signals
         if hasattr(self.test, "finished"):
@@ -73,6 +99,8 @@ class MainWindow(QMainWindow):
 
         # Enter autostart immediately (like Monkeytype)
         self._enter_autostart_mode()
+        if self._recovered is not None:
+            QTimer.singleShot(0, self._offer_recovery)
 
     # ---------------- Top Bar ----------------
     def _build_top_bar(self, parent_layout):
@@ -94,7 +122,21 @@ class MainWindow(QMainWindow):
         theme_btn.setFocusPolicy(Qt.NoFocus)
         h.addWidget(theme_btn)
 
-        # Session / Weak Keys / Load / Reset
+        self.sound_menu = QMenu(self)
+        self._build_sound_menu()
+        sound_btn = QToolButton(bar)
+        sound_btn.setText("Sound")
+        sound_btn.setObjectName("TopBtn")
+        sound_btn.setMenu(self.sound_menu)
+        sound_btn.setPopupMode(QToolButton.InstantPopup)
+        sound_btn.setStyleSheet("QToolButton::menu-indicator { image: none; width:0; height:0; }")
+        sound_btn.setFocusPolicy(Qt.NoFocus)
+        if sound.QSoundEffect is None:
+            sound_btn.setEnabled(False)
+            sound_btn.setToolTip("Sound unavailable (QtMultimedia could not be loaded)")
+        h.addWidget(sound_btn)
+
+        # Session / Weak Keys / History / Race / Load / Reset
         btn_session = QPushButton("Session…", bar)
         btn_session.clicked.connect(self._open_session)
         btn_session.setObjectName("TopBtn")
@@ -107,6 +149,18 @@ class MainWindow(QMainWindow):
         btn_weak.setFocusPolicy(Qt.NoFocus)
         h.addWidget(btn_weak)
 
+        btn_history = QPushButton("History…", bar)
+        btn_history.clicked.connect(self._open_history)
+        btn_history.setObjectName("TopBtn")
+        btn_history.setFocusPolicy(Qt.NoFocus)
+        h.addWidget(btn_history)
+
+        btn_race = QPushButton("Race…", bar)
+        btn_race.clicked.connect(self._open_race)
+        btn_race.setObjectName("TopBtn")
+        btn_race.setFocusPolicy(Qt.NoFocus)
+        h.addWidget(btn_race)
+
         btn_load = QPushButton("Load text…", bar)
         btn_load.clicked.connect(self._on_load)
         btn_load.setObjectName("TopBtn")
@@ -182,6 +236,31 @@ class MainWindow(QMainWindow):
         )
         self.setWindowTitle(f"Typemaster — {theme.name}")
 
+    # ---------------- Sound ----------------
+    def _build_sound_menu(self):
+        group = QActionGroup(self)
+        for name, label in [(None, "Off"), *KEY_SOUNDS.items()]:
+            act = QAction(label, self)
+            act.setCheckable(True)
+            act.setChecked(name is None)
+            act.triggered.connect(lambda _, n=name: self._set_key_sound(n))
+            group.addAction(act)
+            self.sound_menu.addAction(act)
+
+    def _set_key_sound(self, name):
+        if name is None:
+            if self._sound is not None:
+                self._sound.set_enabled(False)
+            return
+        try:
+            if self._sound is None:
+                self._sound = sound.SoundEngine(self, key_sound=name)
+                self.test.sound = self._sound
+            self._sound.set_key_sound(name)
+            self._sound.set_enabled(True)
+        except Exception as e:
+            print(f"Sound error: {e}")
+
     # ---------------- Autostart Flow ----------------
     def _enter_autostart_mode(self):
         self._waiting_for_autostart = True
@@ -209,6 +288,35 @@ class MainWindow(QMainWindow):
         self.test.start_test(self.test.current_text)
         self.test.type_programmatically(nk)
 
+    # ---------------- Crash recovery ----------------
+    def _offer_recovery(self):
+        session, self._recovered = self._recovered, None
+        if session is None:
+            return
+        wpm = scoring.wpm(session.correct_chars, session.active_seconds)
+        box = QMessageBox(self)
+        box.setWindowTitle("Unfinished test")
+        box.setText(
+            f"The last test ended unexpectedly after {session.active_seconds:.0f} s "
+            f"({len(session):,} keystrokes, {wpm:.1f} WPM)."
+        )
+        btn_resume = box.addButton("Resume", QMessageBox.AcceptRole)
+        btn_save = box.addButton("Save result", QMessageBox.ActionRole)
+        box.addButton("Discard", QMessageBox.RejectRole)
+        box.exec()
+        clicked = box.clickedButton()
+        if clicked not in (btn_resume, btn_save):
+            self.test.recorder.reset()
+            return
+        self._exit_autostart_mode()
+        try:
+            self.test.restore_session(session)
+        except Exception as e:
+            QMessageBox.warning(self, "Unfinished test", f"Could not restore the test: {e}")
+            return
+        if clicked == btn_save:
+            self.test.finish_test()
+
     # ---------------- Session / Controls ----------------
     def _open_session(self):
         dlg = SessionDialog(self)
@@ -216,7 +324,7 @@ class MainWindow(QMainWindow):
             return
         cfg = dlg.config
         text = self._assemble_text(cfg["source"])
-        self.test.configure_session(cfg["time_limit"])
+        self.test.configure_session(cfg["time_limit"], ghost=cfg["ghost"])
         self.test.set_text(text)
         self.test.current_text = text
         self._enter_autostart_mode()
@@ -304,60 +412,138 @@ class MainWindow(QMainWindow):
         QMessageBox.warning(self, "Load Text", msg)
 
     # ---------------- Text Source ----------------
-    def _load_blocks(self, filename):
-        p = pathlib.Path("assets/texts") / filename
-        if not p.exists():
-            return []
-        txt = p.read_text(encoding="utf-8").strip()
-        return [b.strip() for b in txt.split("\n\n") if b.strip()]
-
-    def _endless(self, blocks, min_chars=50000):
-        if not blocks:
-            return ""
-        out, total, pool, i = [], 0, blocks[:], 0
-        random.shuffle(pool)
-        while total < min_chars:
-            out.append(pool[i])
-            total += len(pool[i]) + 2
-            i = (i + 1) % len(pool)
-            if i == 0:
-                random.shuffle(pool)
-        return "\n\n".join(out)
-
     def _assemble_text(self, source):
-        file_map = {
-            "Paragraph": "paragraph.txt",
-            "Quotes": "quotes.txt",
-            "Code Snippets": "codesnippets.txt",
-            "Numbers": "numbers.txt",
-            "Punctuation": "punctuation.txt",
-        }
-        filename = file_map.get(source, "paragraph.txt")
-        blocks = self._load_blocks(filename)
-        if source == "Paragraph":
-            return self._endless(blocks)
-        return random.choice(blocks) if blocks else ""
+        if source == "Weak Keys Drill":
+            return self._weak_drill_text()
+        return corpus.assemble(source)
+
+    def _weak_drill_text(self, n_words=500):
+        # single keys from this run + all-time slow bigrams
+        weights = dict(self.test.weak.snapshot())
+        for gram, score, _count, _mean, _err in self.ngram_history.worst(25):
+            if len(gram) == 2:
+                weights[gram] = weights.get(gram, 0.0) + score / 100.0
+        return corpus_index().build(weights, n_words=n_words)
 
     # ---------------- Weak Keys ----------------
     def _open_weakkeys(self):
         ranked = []
         try:
-            snap = self.test.weak.snapshot()
-            for key, score in snap.items():
-                hits = max(1, int(score))
-                miss = int(score // 2)
-                attempts = hits + miss
-                miss_rate = miss / attempts if attempts else 0
-                ranked.append((key, miss_rate, hits, miss))
-            ranked.sort(key=lambda r: r[1], reverse=True)
-        except:
+            ranked = self.test.weak.ranked()
+        except Exception:
+            pass
+        timing = None
+        try:
+            timing = analyze_timing(self.test.recorder.records())
+        except Exception:
             pass
-        WeakKeysDialog(ranked, self).exec()
+        ngrams = self.ngram_history.worst(25)
+        if self._weak_dlg is None:
+            self._weak_dlg = WeakKeysDialog(self)
+            self._weak_dlg.drillRequested.connect(self._start_weak_drill)
+        self._weak_dlg.set_data(ranked, timing=timing, ngrams=ngrams)
+        self._weak_dlg.exec()
+
+    # ---------------- History ----------------
+    def _open_history(self):
+        if self._history_dlg is None:
+            self._history_dlg = HistoryWindow(self.user_id, self)
+        self._history_dlg.refresh()
+        self._history_dlg.exec()
+
+    # ---------------- LAN race ----------------
+    def _open_race(self):
+        if self._race is not None:
+            if QMessageBox.question(self, "Race", "Leave the current race?") == QMessageBox.Yes:
+                self._leave_race()
+            return
+        addr, ok = QInputDialog.getText(self, "Join Race", "Race server (host:port):", text="127.0.0.1:8765")
+        if not ok or not addr.strip():
+            return
+        host, _, port = addr.strip().rpartition(":")
+        try:
+            port = int(port)
+        except ValueError:
+            QMessageBox.warning(self, "Race", f"Not a host:port address: {addr}")
+            return
+        self._race = RaceClient(self)
+        self._race.passage.connect(self._on_race_passage)
+        self._race.opponents.connect(self._on_race_opponents)
+        self._race.disconnected.connect(self._on_race_disconnected)
+        self._race.connect_to(host or "127.0.0.1", port)
+        self._race_finish_sent = False
+        self._race_tick.start()
+        self.setWindowTitle("Typemaster — waiting for racers...")
+
+    def _leave_race(self):
+        self._race_tick.stop()
+        if self._race is not None:
+            self._race.close()
+            self._race.deleteLater()
+            self._race = None
+        self.test.set_opponent_carets([])
+
+    def _on_race_passage(self, race_id, countdown, text):
+        self._race_finish_sent = False
+        self._exit_autostart_mode()
+        self.test.reset_test(text)
+        self.test.configure_session(None)
+        self.setWindowTitle(f"Typemaster — race starts in {countdown:.0f} s")
+        QTimer.singleShot(int(countdown * 1000), lambda: self._start_race(race_id))
+
+    def _start_race(self, race_id):
+        # a newer passage may have arrived during the countdown
+        if self._race is None or self._race.race_id != race_id:
+            return
+        self.test.start_test(self.test.current_text)
+        self.setWindowTitle("Typemaster — race!")
+
+    def _on_race_tick(self):
+        caret, wpm, running = self.test.progress()
+        if running:
+            self._race.report(caret, wpm)
+        elif caret and not self._race_finish_sent:
+            # also runs while the summary dialog is open, so opponents
+            # see us finish right away
+            self._race.send_finish(caret, wpm, self.test.engine.accuracy() * 100.0)
+            self._race_finish_sent = True
+
+    def _on_race_opponents(self, players):
+        self.test.set_opponent_carets(
+            caret for _flags, caret, _wpm in players.values()
+        )
+
+    def _on_race_disconnected(self, msg):
+        if self._race is None:
+            return
+        self._leave_race()
+        QMessageBox.warning(self, "Race", msg)
+
+    def _start_weak_drill(self):
+        text = self._assemble_text("Weak Keys Drill")
+        self.test.configure_session(None)
+        self.test.set_text(text)
+        self.test.current_text = text
+        self._enter_autostart_mode()
+
+    def _load_ngram_history(self) -> NgramMiner:
+        path = history_path(self.user_id)
+        if path.exists():
+            try:
+                return NgramMiner.load(path)
+            except Exception:
+                pass
+        return NgramMiner()
 
     # ---------------- Save Result ----------------
     def _on_test_finished(self, wpm, acc, dur, weak):
         try:
-            insert_result(self.user_id, wpm, acc, dur, json.dumps(weak))
+            insert_result(self.user_id, wpm, acc, dur, json.dumps(weak), self.test.last_trace_path)
         except:
             pass
+        try:
+            self.ngram_history.merge(self.test.weak.take_ngrams())
+            self.ngram_history.save(history_path(self.user_id))
+        except Exception:
+            pass
         self.setWindowTitle(f"Typemaster — {wpm:.1f} WPM")
@@ -0,0 +1,59 @@
+# ui/mono_layout.py
+"""
+Caret columns for fixed-pitch text (code mode).
+
+With a monospace font every glyph has the same advance, so the caret slot
+before a char is just (line, visual column) times (line height, advance).
+The advance is measured once per font. Tabs jump to the next multiple of
+`tab_cols` columns, the rule QPlainTextEdit follows when its tab stop
+distance is `tab_cols * advance` (see tab_stop_distance()).
+
+Text layout and painting stay with QPlainTextEdit; this only replaces the
+per-caret document cursor lookups. Line starts come from the shared
+TextProfile.
+"""
+from __future__ import annotations
+from typing import Tuple
+
+from PySide6.QtGui import QFont, QFontInfo, QFontMetricsF
+
+from typecore.text_profile import profile_for
+
+TAB_COLS = 4
+
+
+def advance_for(font: QFont) -> float:
+    """Advance of one glyph, or 0.0 if the font is not really fixed-pitch."""
+    if not QFontInfo(font).fixedPitch():
+        return 0.0
+    return QFontMetricsF(font).horizontalAdvance(" ")
+
+
+def tab_stop_distance(advance: float, tab_cols: int = TAB_COLS) -> float:
+    return tab_cols * advance
+
+
+def expand_cols(s: str, tab_cols: int = TAB_COLS, col: int = 0) -> int:
+    """Visual column after laying out `s` from column `col`."""
+    if "\t" not in s:
+        return col + len(s)
+    parts = s.split("\t")
+    for part in parts[:-1]:
+        col += len(part)
+        col = (col // tab_cols + 1) * tab_cols
+    return col + len(parts[-1])
+
+
+class MonoLayout:
+    """(line, visual column) of caret slots in `text`; lines are not wrapped."""
+
+    def __init__(self, text: str, tab_cols: int = TAB_COLS):
+        self.text = text
+        self.tab_cols = max(1, int(tab_cols))
+        self._profile = profile_for(text)
+
+    def line_col(self, pos: int) -> Tuple[int, int]:
+        """(line, visual column) of the caret slot before char `pos`."""
+        pos = max(0, min(pos, len(self.text)))
+        line, col = self._profile.line_col(pos)
+        return line, expand_cols(self.text[pos - col:pos], self.tab_cols)
@@ -2,9 +2,17 @@
 from __future__ import annotations
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton
 import pyqtgraph as pg
-import math
+import numpy as np
 from typing import Sequence
-import bisect
+import itertools
+
+from utils.decimate import decimate, merge_envelope
+
+_series_ids = itertools.count()
+
+
+# time-constant span handled per closed-form block; keeps exp() well inside float range
+_EMA_BLOCK = 50.0
 
 
 def smooth_wpm_time_aware(
@@ -13,36 +21,43 @@ def smooth_wpm_time_aware(
     tau_seconds: float = 2.5,
     blend_with_cumulative: bool = True,
     cumulative_weight: float = 0.25,
-) -> list[float]:
+) -> np.ndarray:
     """
     Time-aware exponential smoothing (EMA) of WPM values.
     Preserves timestamps length. Suitable for instantaneous WPM series.
-    """
-    if not timestamps or not raw_wpm or len(timestamps) != len(raw_wpm):
-        return list(raw_wpm)
-
-    smoothed = [raw_wpm[0]]
-    last_t = timestamps[0]
 
-    for i in range(1, len(timestamps)):
-        t = timestamps[i]
-        dt = max(1e-6, t - last_t)
-        last_t = t
-        alpha = 1.0 - math.exp(-dt / float(tau_seconds))
-        new_val = alpha * raw_wpm[i] + (1.0 - alpha) * smoothed[-1]
-        smoothed.append(new_val)
+    The recurrence s[i] = a[i]*x[i] + (1-a[i])*s[i-1] with 1-a[i] = exp(-dt/tau)
+    is evaluated in closed form with cumulative sums, block by block so the
+    exponentials never overflow.
+    """
+    t = np.asarray(timestamps, dtype=np.float64)
+    x = np.asarray(raw_wpm, dtype=np.float64)
+    if len(t) == 0 or len(x) == 0 or len(t) != len(x):
+        return x.copy()
+
+    n = len(x)
+    decay = np.empty(n)
+    decay[0] = 0.0
+    decay[1:] = np.maximum(1e-6, np.diff(t)) / float(tau_seconds)
+    D = np.cumsum(decay)
+    alpha = -np.expm1(-decay)
+
+    smoothed = np.empty(n)
+    smoothed[0] = x[0]
+    prev = x[0]
+    b = 1
+    while b < n:
+        e = max(b + 1, int(np.searchsorted(D, D[b] + _EMA_BLOCK, side="right")))
+        rel = D[b:e] - D[b]
+        acc = np.cumsum(alpha[b:e] * x[b:e] * np.exp(rel))
+        block = np.exp(-rel) * (prev * np.exp(-decay[b]) + acc)
+        smoothed[b:e] = block
+        prev = block[-1]
+        b = e
 
     if blend_with_cumulative:
-        cum = []
-        s = 0.0
-        for i, v in enumerate(raw_wpm):
-            s += v
-            cum.append(s / (i + 1))
-        blended = [
-            cumulative_weight * cum[i] + (1.0 - cumulative_weight) * smoothed[i]
-            for i in range(len(smoothed))
-        ]
-        return blended
+        cum = np.cumsum(x) / np.arange(1, n + 1)
+        return cumulative_weight * cum + (1.0 - cumulative_weight) * smoothed
 
     return smoothed
 
@@ -53,83 +68,64 @@ def detect_cumulative_style(times: Sequence[float], wpms: Sequence[float]) -> bo
     - Very large values at start (e.g. >1e4) OR
     - Strictly decreasing pattern that decays rapidly.
     """
-    if not times or not wpms or len(times) != len(wpms):
+    w = np.asarray(wpms, dtype=np.float64)
+    if len(times) == 0 or len(w) == 0 or len(times) != len(w):
         return False
 
-    max_w = max(wpms)
-    if max_w > 1e4:  # obvious blow-up (division by near zero elapsed time)
+    if w.max() > 1e4:  # obvious blow-up (division by near zero elapsed time)
         return True
 
     # Check for rapid monotonic decay: count how many early samples drop more than 50%
-    drops = 0
-    check_len = min(len(wpms) - 1, 6)
-    for i in range(check_len):
-        if wpms[i] > 0 and wpms[i + 1] < 0.6 * wpms[i]:
-            drops += 1
-    if drops >= max(1, check_len // 3):
-        return True
-
-    return False
+    check_len = min(len(w) - 1, 6)
+    head, nxt = w[:check_len], w[1:check_len + 1]
+    drops = int(np.count_nonzero((head > 0) & (nxt < 0.6 * head)))
+    return drops >= max(1, check_len // 3)
 
 
 def convert_cumulative_wpm_to_instant(
     times: Sequence[float],
     cum_wpms: Sequence[float],
     window_seconds: float = 2.0,
-) -> list[float]:
+) -> np.ndarray:
     """
     Convert cumulative-average WPM series into instantaneous WPM sampled over a moving window.
     """
-    n = len(times)
-    if n == 0 or n != len(cum_wpms):
-        return [0.0] * len(cum_wpms)
-
-    # Build estimated total chars at each sample
-    total_chars = [0.0] * n
-    for i, (t, w) in enumerate(zip(times, cum_wpms)):
-        safe_t = max(1e-6, t)
-        total_chars[i] = w * (5.0 * safe_t) / 60.0
-
-    ts = list(times)
-    inst = [0.0] * n
-    for i in range(n):
-        t_i = times[i]
-        window_start = t_i - window_seconds
-        j = bisect.bisect_left(ts, window_start)
-        chars_in_window = total_chars[i] - (total_chars[j] if j >= 0 else 0.0)
-        if chars_in_window < 0:
-            chars_in_window = 0.0
-        if window_seconds > 1e-6:
-            inst[i] = (chars_in_window * 60.0) / (5.0 * window_seconds)
-        else:
-            inst[i] = 0.0
+    t = np.asarray(times, dtype=np.float64)
+    w = np.asarray(cum_wpms, dtype=np.float64)
+    n = len(t)
+    if n == 0 or n != len(w):
+        return np.zeros(len(w))
+    if window_seconds <= 1e-6:
+        return np.zeros(n)
 
-    return inst
+    # estimated total chars at each sample, then the chars inside each window
+    total_chars = w * (5.0 * np.maximum(1e-6, t)) / 60.0
+    j = np.searchsorted(t, t - window_seconds, side="left")
+    chars_in_window = np.maximum(0.0, total_chars - total_chars[j])
+    return (chars_in_window * 60.0) / (5.0 * window_seconds)
 
 
 class SessionSummary(QDialog):
     """
     Displays final stats and a static WPM-over-time graph.
     This version hides the faint dotted cumulative baseline.
+
+    Built once and reused: set_session() swaps in a new session's data and
+    updates the existing labels and plot items in place.
     """
 
-    def __init__(
-        self,
-        wpm: float,
-        acc: float,
-        secs: float,
-        times: list[float],
-        wpms: list[float],
-        parent=None,
-    ):
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Session Summary")
         self.resize(720, 420)
 
         root = QVBoxLayout(self)
-        root.addWidget(QLabel(f"WPM: {wpm:.1f}"))
-        root.addWidget(QLabel(f"Accuracy: {acc:.1f}%"))
-        root.addWidget(QLabel(f"Time: {secs:.1f}s"))
+        self.lbl_wpm = QLabel()
+        self.lbl_acc = QLabel()
+        self.lbl_time = QLabel()
+        root.addWidget(self.lbl_wpm)
+        root.addWidget(self.lbl_acc)
+        root.addWidget(self.lbl_time)
 
         # Plot setup
         plot = pg.PlotWidget()
@@ -141,45 +137,111 @@ class SessionSummary(QDialog):
         plot.setLabel("left", "WPM")
         plot.setLabel("bottom", "Time (s)")
 
-        # Ensure lists are floats
-        times = [float(t) for t in times]
-        wpms = [float(v) for v in wpms]
+        # Smoothed series (solid line only), decimated to the plot width;
+        # a faint min/max envelope keeps peaks visible when points are dropped
+        # or were merged into the series' coarser buckets
+        self._env_lo = pg.PlotDataItem([], [], pen=None)
+        self._env_hi = pg.PlotDataItem([], [], pen=None)
+        self._env_fill = pg.FillBetweenItem(self._env_lo, self._env_hi, brush=pg.mkBrush(200, 200, 255, 40))
+        plot.addItem(self._env_fill)
+        self._curve = plot.plot(
+            [],
+            [],
+            pen=pg.mkPen(color=(200, 200, 255), width=2),
+            symbol=None,
+        )
+        self.plot = plot
+        self._times = np.empty(0)
+        self._smoothed = np.empty(0)
+        self._envelope = None
+        self._series_key = None
+        # drawn on show / resize, once the plot has its real width
+        self._drawn_width = None
+
+        # NOTE: The cumulative (dotted) baseline plotting was intentionally removed.
+        # If you want it back later, re-add a plot like:
+        # from PySide6 import QtCore
+        # plot.plot(times, cum, pen=pg.mkPen(color=(80, 80, 100), width=1, style=QtCore.Qt.DashLine))
+
+        root.addWidget(plot, stretch=1)
+
+        btn = QPushButton("OK", self)
+        btn.clicked.connect(self.accept)
+        root.addWidget(btn)
+
+    def set_session(
+        self,
+        wpm: float,
+        acc: float,
+        secs: float,
+        times: Sequence[float],
+        wpms: Sequence[float],
+        envelope=None,
+    ):
+        """
+        envelope: optional (times, min, max) of the recorded WPM per stored
+        bucket (MultiResSeries.envelope()); drawn instead of the decimation
+        envelope so peaks inside long-merged buckets still show.
+        """
+        self.lbl_wpm.setText(f"WPM: {wpm:.1f}")
+        self.lbl_acc.setText(f"Accuracy: {acc:.1f}%")
+        self.lbl_time.setText(f"Time: {secs:.1f}s")
+
+        # Ensure arrays are floats
+        times = np.asarray(times, dtype=np.float64)
+        wpms = np.asarray(wpms, dtype=np.float64)
 
         # If data looks like cumulative averages (common), convert to instant WPM
         if detect_cumulative_style(times, wpms):
             window_seconds = 2.0
             wpms_instant = convert_cumulative_wpm_to_instant(times, wpms, window_seconds=window_seconds)
+            envelope = None  # bounds of the cumulative values; they no longer match
         else:
             wpms_instant = wpms  # already instantaneous
+        self._envelope = None if envelope is None else tuple(np.asarray(a, dtype=np.float64) for a in envelope)
 
         # Now smooth and optionally blend with cumulative baseline (but we won't plot the baseline)
         tau_seconds = 2.5
         blend_with_cumulative = True
         cumulative_weight = 0.25
 
-        wpms_smoothed = smooth_wpm_time_aware(
+        self._times = times
+        self._smoothed = smooth_wpm_time_aware(
             times,
             wpms_instant,
             tau_seconds=tau_seconds,
             blend_with_cumulative=blend_with_cumulative,
             cumulative_weight=cumulative_weight,
         )
-
-        # Plot smoothed series (solid line only)
-        plot.plot(
-            times,
-            wpms_smoothed,
-            pen=pg.mkPen(color=(200, 200, 255), width=2),
-            symbol=None,
-        )
-
-        # NOTE: The cumulative (dotted) baseline plotting was intentionally removed.
-        # If you want it back later, re-add a plot like:
-        # from PySide6 import QtCore
-        # plot.plot(times, cum, pen=pg.mkPen(color=(80, 80, 100), width=1, style=QtCore.Qt.DashLine))
-
-        root.addWidget(plot, stretch=1)
-
-        btn = QPushButton("OK", self)
-        btn.clicked.connect(self.accept)
-        root.addWidget(btn)
+        # new key per session; old entries age out of the decimation LRU
+        self._series_key = ("summary", next(_series_ids))
+        self._drawn_width = None
+        if self.isVisible():
+            self._redraw()
+
+    def _redraw(self):
+        width = max(100, self.plot.width())
+        if width == self._drawn_width:
+            return
+        self._drawn_width = width
+        d = decimate(self._times, self._smoothed, width, key=self._series_key)
+        self._curve.setData(d.x, d.y)
+        envelope = d.envelope
+        if self._envelope is not None and len(self._envelope[0]):
+            envelope = merge_envelope(*self._envelope, width)
+        if envelope is None:
+            self._env_lo.setData([], [])
+            self._env_hi.setData([], [])
+        else:
+            ex, lo, hi = envelope
+            self._env_lo.setData(ex, lo)
+            self._env_hi.setData(ex, hi)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # a reused dialog keeps its size, so no resize arrives for new data
+        self._redraw()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._redraw()
@@ -1,42 +1,33 @@
 from __future__ import annotations
-from collections import deque
+from time import perf_counter_ns
+import html
 
 from PySide6.QtCore import Qt, QTimer, Slot, Signal
+from PySide6.QtGui import QFontMetricsF
 from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QSizePolicy
-
-from services.typing_engine import TypingEngine
-from services.weakkeys import WeakKeys
+import pyqtgraph as pg
+
+from typecore.engine import TypingEngine
+from typecore.weakkeys import WeakKeys
+from typecore import tracing
+from typecore.trace import BACKSPACE, TraceWriter, new_trace_path
+from typecore.journal import SessionJournal
+from typecore.ghost import load_ghosts
+from typecore.text_profile import profile_for
+from typecore.wpm_series import MultiResSeries
+from typecore.lexer import cached as cached_tokens, content_key
 from core.chrono import RealtimeTimer
+from core.threads import LexWorker, Workers
 from ui.session_summary import SessionSummary
 from ui.widgets.code_block import CodeBlock
+from ui.line_layout import line_starts, line_index
+from utils.graph_helper import setup_wpm_plot, LiveCurve
 
 
 def _get(theme, name, default):
     return getattr(theme, name, default)
 
 
-def _looks_like_code(text: str) -> bool:
-    """Detect code by checking for indentation patterns."""
-    if not text:
-        return False
-    lines = text.splitlines()
-    indent_count = 0
-    for ln in lines:
-        if ln.startswith("\t") or ln.startswith("    "):
-            return True
-        stripped = ln.lstrip()
-        if stripped.startswith(("def ", "class ", "function ", "import ", "from ", "const ", "let ", "var ")):
-            if len(lines) > 1:
-                return True
-        if "{" in ln or "}" in ln or "=>" in ln:
-            if len(lines) > 1:
-                return True
-        if len(ln) - len(stripped) >= 2:
-            indent_count += 1
-    if len(lines) >= 3 and indent_count >= max(1, len(lines) // 6):
-        return True
-    return False
-
 
 class TestUI(QWidget):
     finished = Signal(float, float, float, dict)
@@ -69,6 +60,16 @@ class TestUI(QWidget):
             stats.addWidget(lab)
         root.addLayout(stats)
 
+        # live WPM sparkline
+        self.spark = pg.PlotWidget(self)
+        self.spark.setFixedHeight(60)
+        self.spark.setMinimumWidth(900)
+        self.spark.setMaximumWidth(1100)
+        self._spark = LiveCurve(setup_wpm_plot(self.spark, "#eab308"))
+        self.spark.hideAxis("left")
+        self.spark.hideAxis("bottom")
+        root.addWidget(self.spark, alignment=Qt.AlignHCenter)
+
         self.lblLine = QLabel("", self)
         self.lblLine.setObjectName("lblLine")
         self.lblLine.setTextFormat(Qt.RichText)
@@ -92,6 +93,16 @@ class TestUI(QWidget):
 
         self.engine = TypingEngine("")
         self.weak = WeakKeys()
+        # keystrokes go straight to a crash-safe journal file while typing
+        self.recorder = SessionJournal()
+        self.last_trace_path = None
+        # background syntax lexing for code texts (content key of the latest request)
+        self._lex_key = None
+        self._lex_worker = None
+        # keystroke sounds (core/sound.py); set by the main window when enabled
+        self.sound = None
+        # summary dialog is built on the first finished test and reused
+        self._summary = None
 
         self.timer = RealtimeTimer(tick_ms=100, parent=self)
         self.timer.elapsedChanged.connect(self.on_elapsed_changed)
@@ -101,6 +112,27 @@ class TestUI(QWidget):
         self._ui_tick.timeout.connect(self.refresh_metrics)
         self._ui_tick.start()
 
+        # flush the sparkline at most once per display frame
+        self._spark_tick = QTimer(self)
+        self._spark_tick.setInterval(16)
+        self._spark_tick.timeout.connect(self._spark.flush)
+        self._spark_tick.start()
+
+        self._journal_tick = QTimer(self)
+        self._journal_tick.setInterval(1000)
+        self._journal_tick.timeout.connect(self._checkpoint_journal)
+        self._journal_tick.start()
+
+        # ghost racers (previous traces replayed as extra carets)
+        self._ghosts = []
+        self._ghost_mode = False
+        self._ghost_positions: list[int] = []
+        self._ghost_tick = QTimer(self)
+        self._ghost_tick.setInterval(33)
+        self._ghost_tick.timeout.connect(self._on_ghost_tick)
+        # race opponents' carets, drawn like ghosts
+        self._opponent_positions: list[int] = []
+
         self._active_seconds = 0.0
         self._running = False
         self._paused = False
@@ -108,20 +140,17 @@ class TestUI(QWidget):
         self._is_code_mode: bool = False
         self._time_limit: int | None = None
 
-        self._wpm_time = deque(maxlen=3600)
-        self._wpm_vals = deque(maxlen=3600)
+        # whole-session WPM curve in fixed memory (older samples downsampled)
+        self._wpm_series = MultiResSeries()
 
-        self._approx_chars_per_line = 90
         self._visible_lines = 3
-        self._win_start = 0
-        self._left_margin = 0.30
-        self._right_margin = 0.70
 
         self._colors = {
             "ok": "#22c55e",
             "err": "#ef4444",
             "mut": "#9aa1a9",
             "caret": "#eab308",
+            "ghost": "rgba(154,161,169,0.8)",
             "word_bg": "rgba(234,179,8,0.10)",
             "err_ul": "rgba(239,68,68,0.9)",
         }
@@ -134,25 +163,28 @@ class TestUI(QWidget):
     def type_programmatically(self, nk: str):
         if not nk:
             return
+        latency_ms, expected = self._record_key(nk)
         before = self.engine.stats.correct_chars
         self.engine.process_key(nk)
         correct_now = self.engine.stats.correct_chars > before
-        self.weak.note(nk, correct_now)
+        if self.sound is not None:
+            self.sound.key(correct_now)
+        self.weak.note(nk, correct_now, latency_ms, expected)
         self._render_line()
 
     def set_text(self, text: str, is_code: bool = False):
         """Set target text."""
         if not is_code:
-            is_code = _looks_like_code(text)
+            is_code = profile_for(text).is_code
         
         self._is_code_mode = is_code
         self.engine.target = text
         self.engine.typed = ""
-        self._win_start = 0
 
         if is_code:
             try:
                 self.codeBlock.set_code(text)
+                self._request_tokens(text)
                 caret_pos = 0
                 self.codeBlock.set_caret(caret_pos, visible=True)
                 self.codeBlock.setVisible(True)
@@ -171,6 +203,26 @@ class TestUI(QWidget):
             self.lblLine.setVisible(True)
             self._render_line()
 
+    def _request_tokens(self, text: str):
+        """Syntax colours for a code text: from the lexer cache, else lexed on the pool."""
+        key = content_key(text)
+        self._lex_key = key
+        tokens = cached_tokens(text, key)
+        if tokens is not None:
+            self.codeBlock.set_tokens(tokens)
+            return
+        worker = LexWorker(text, key)
+        worker.signals.done.connect(self._on_tokens)
+        worker.signals.failed.connect(lambda msg: print(f"Lexer error: {msg}"))
+        self._lex_worker = worker
+        Workers.pool.start(worker)
+
+    @Slot(object, object)
+    def _on_tokens(self, key, tokens):
+        # a newer text may have been set while this one was lexing
+        if key == self._lex_key and self._is_code_mode:
+            self.codeBlock.set_tokens(tokens)
+
     def load_text_file(self, file_path: str):
         """Load text file preserving formatting."""
         try:
@@ -179,7 +231,7 @@ class TestUI(QWidget):
             text = text.replace("\r\n", "\n").replace("\r", "\n")
             if text.endswith("\n\n"):
                 text = text.rstrip("\n") + "\n"
-            is_code = _looks_like_code(text)
+            is_code = profile_for(text).is_code
             self.set_text(text, is_code=is_code)
         except Exception as e:
             try:
@@ -216,7 +268,9 @@ class TestUI(QWidget):
         self._colors["err"] = _get(theme, "error", "#ef4444")
         self._colors["mut"] = _get(theme, "text_muted", _get(theme, "secondary", "#9aa1a9"))
         self._colors["caret"] = _get(theme, "caret", _get(theme, "accent", "#eab308"))
+        self._colors["ghost"] = self._hex_to_rgba(_get(theme, "secondary", "#9aa1a9"), 0.8)
         acc = _get(theme, "accent", "#eab308")
+        self._spark.curve.setPen(pg.mkPen(acc, width=2.5))
         self._colors["word_bg"] = self._hex_to_rgba(acc, 0.10)
         self._colors["err_ul"] = self._hex_to_rgba(self._colors["err"], 0.9)
         
@@ -225,29 +279,39 @@ class TestUI(QWidget):
                 correct=self._colors["ok"],
                 error=self._colors["err"],
                 untyped=self._colors["mut"],
-                caret=self._colors["caret"]
+                caret=self._colors["caret"],
+                ghost=_get(theme, "secondary", "#9aa1a9"),
+            )
+            self.codeBlock.set_syntax_colors(
+                accent=_get(theme, "accent", "#eab308"),
+                text=_get(theme, "primary", "#e6e6e6"),
             )
         except Exception:
             pass
         
         self._render_line()
 
-    def configure_session(self, time_limit=None):
+    def configure_session(self, time_limit=None, ghost: bool = False):
         try:
             self._time_limit = int(time_limit) if time_limit else None
         except Exception:
             self._time_limit = None
+        self._ghost_mode = bool(ghost)
 
     def start_test(self, text: str | None = None):
         if text is not None:
             self.set_text(text)
         self.engine.reset()
-        self._wpm_time.clear()
-        self._wpm_vals.clear()
+        self.recorder.begin(self.engine.target, self._time_limit)
+        self.weak.break_sequence()
+        self._wpm_series.clear()
+        self._spark.clear()
         self._active_seconds = 0.0
+        self._start_ghosts()
         self._render_line()
         self.timer.start()
         self._running = True
+        self._paused = False
         self.setFocus()
 
     def pause_test(self):
@@ -261,25 +325,37 @@ class TestUI(QWidget):
             self._paused = False
 
     def finish_test(self):
+        was_running = self._running
         if self._running:
             self.timer.stop()
             self._running = False
+            if self.sound is not None:
+                self.sound.finish()
+        self._stop_ghosts()
         self.refresh_metrics()
 
         wpm = self.engine.wpm(self._active_seconds)
         acc = self.engine.accuracy() * 100.0
         snapshot = self.weak.snapshot()
 
+        self.last_trace_path = None
+        if was_running:
+            self._wpm_series.append(self._active_seconds, wpm)
+            self._save_trace(wpm, acc)
+        times, wpms = self._wpm_series.arrays()
+
         try:
-            dlg = SessionSummary(
+            if self._summary is None:
+                self._summary = SessionSummary(parent=self)
+            self._summary.set_session(
                 wpm=wpm,
                 acc=acc,
                 secs=self._active_seconds,
-                times=list(self._wpm_time),
-                wpms=list(self._wpm_vals),
-                parent=self,
+                times=times,
+                wpms=wpms,
+                envelope=self._wpm_series.envelope(),
             )
-            dlg.exec()
+            self._summary.exec()
         except Exception:
             pass
 
@@ -287,8 +363,105 @@ class TestUI(QWidget):
             self.finished.emit(wpm, acc, self._active_seconds, snapshot)
         except Exception:
             pass
+        # the result is saved; keep the keystrokes for analysis but drop the file
+        self.recorder.end()
+
+        self._render_line()
+
+    def _save_trace(self, wpm: float, acc: float):
+        """Stream the session's keystrokes to a binary trace file."""
+        if not len(self.recorder):
+            return
+        try:
+            path = new_trace_path()
+            with TraceWriter(path, self.engine.target) as w:
+                w.write(self.recorder.records())
+                w.set_result(self._active_seconds, wpm, acc)
+            self.last_trace_path = str(path)
+        except Exception as e:
+            print(f"Trace save error: {e}")
+
+    # ---------- ghosts ----------
+    def _start_ghosts(self):
+        self._stop_ghosts()
+        if not self._ghost_mode or not self.engine.target:
+            return
+        try:
+            self._ghosts = load_ghosts(self.engine.target, limit=3)
+        except Exception as e:
+            print(f"Ghost load error: {e}")
+            self._ghosts = []
+        if self._ghosts:
+            self._ghost_positions = [0] * len(self._ghosts)
+            self._ghost_tick.start()
+
+    def _stop_ghosts(self):
+        self._ghost_tick.stop()
+        for g in self._ghosts:
+            g.close()
+        self._ghosts = []
+        if self._ghost_positions:
+            self._ghost_positions = []
+            self.codeBlock.set_ghost_carets(self._opponent_positions)
+
+    def _on_ghost_tick(self):
+        secs = self.timer.seconds()
+        positions = [g.position_at(secs) for g in self._ghosts]
+        if positions != self._ghost_positions:
+            self._ghost_positions = positions
+            self._render_line()
 
+    def set_opponent_carets(self, positions):
+        positions = list(positions)
+        if positions != self._opponent_positions:
+            self._opponent_positions = positions
+            self._render_line()
+
+    def _other_carets(self) -> list[int]:
+        return self._ghost_positions + self._opponent_positions
+
+    def progress(self):
+        """(caret, live WPM, running) for observers such as a race client."""
+        return len(self.engine.typed), self.engine.wpm(self._active_seconds), self._running
+
+    def restore_session(self, session):
+        """
+        Reload an unfinished session from the journal (see typecore/journal.py).
+        The test comes back paused; the next key resumes it.
+        """
+        self._stop_ghosts()
+        self.configure_session(session.time_limit)
+        self.set_text(session.text)
+        self.current_text = session.text
+        self.engine.reset()
+        self.engine.typed = session.typed
+        self.engine.stats.keystrokes = session.keystrokes
+        self.engine.stats.correct_chars = session.correct_chars
+        self.engine.stats.errors = session.keystrokes - session.correct_chars
+        self.weak.note_records(session.records)
+        self.recorder.resume(session)
+        self._wpm_series.clear()
+        self._spark.clear()
+        self._active_seconds = session.active_seconds
+        self.timer.start(session.active_seconds)
+        self.timer.pause()
+        self._running = True
+        self._paused = True
+        self.lblTimer.setText(f"{session.active_seconds:0.1f} s")
+        self.refresh_metrics()
         self._render_line()
+        self.setFocus()
+
+    def _checkpoint_journal(self):
+        if self._running:
+            self.recorder.checkpoint(self.timer.seconds())
+
+    def _record_key(self, nk: str):
+        pos = len(self.engine.typed)
+        tgt = self.engine.target or ""
+        expected = "" if nk == "<BACKSPACE>" or pos >= len(tgt) else tgt[pos]
+        dt_us = self.recorder.record(self.timer.seconds(), nk, expected)
+        return dt_us / 1000.0, expected
 
     @Slot(float)
     def on_elapsed_changed(self, secs: float):
@@ -302,11 +475,13 @@ class TestUI(QWidget):
         acc = self.engine.accuracy() * 100.0
         self.lblWPM.setText(f"{wpm:0.1f} WPM")
         self.lblAcc.setText(f"{acc:0.1f} %")
-        self._wpm_time.append(self._active_seconds)
-        self._wpm_vals.append(wpm)
+        if self._running and not self._paused:
+            self._wpm_series.append(self._active_seconds, wpm)
+            self._spark.append(self._active_seconds, wpm)
 
     def _render_line(self):
         """Render with color feedback."""
+        t0 = perf_counter_ns()
         if self._is_code_mode:
             try:
                 typed = self.engine.typed or ""
@@ -314,8 +489,10 @@ class TestUI(QWidget):
                 self.codeBlock.set_typing_state(typed, target)
                 caret_pos = len(typed)
                 self.codeBlock.set_caret(caret_pos, visible=True)
+                self.codeBlock.set_ghost_carets(self._other_carets())
             except Exception as e:
                 print(f"Render error: {e}")
+            tracing.event(tracing.RENDER, perf_counter_ns() - t0)
             
             if self._running and len(self.engine.typed) >= len(self.engine.target):
                 self.finish_test()
@@ -323,25 +500,17 @@ class TestUI(QWidget):
 
         tgt = self.engine.target or ""
         typed = self.engine.typed or ""
-        window_chars = self._approx_chars_per_line * self._visible_lines
+        prof = profile_for(tgt)
         caret = min(len(typed), len(tgt))
 
-        left_band = self._win_start + int(window_chars * self._left_margin)
-        right_band = self._win_start + int(window_chars * self._right_margin)
-
-        if caret < left_band or caret > right_band:
-            desired_center = self._win_start + window_chars // 2
-            shift = caret - desired_center
-            new_start = max(0, self._win_start + shift)
-            new_start = self._snap_to_prev_space(tgt, new_start, limit=40)
-            self._win_start = new_start
-
-        start = self._win_start
-        end = min(len(tgt), start + window_chars)
-
-        if end < len(tgt) and not tgt[end].isspace():
-            while end < len(tgt) and not tgt[end].isspace():
-                end += 1
+        # real wrapped lines for the label's font and width; keep the caret
+        # on the second visible line and render one line of lookahead
+        starts = line_starts(tgt, self.lblLine.font(), self._wrap_width())
+        caret_line = line_index(starts, caret)
+        first = max(0, caret_line - 1)
+        last = min(len(starts), first + self._visible_lines + 1)
+        start = starts[first]
+        end = starts[last] if last < len(starts) else len(tgt)
 
         display = tgt[start:end]
         typed_rel = max(0, len(typed) - start)
@@ -351,11 +520,12 @@ class TestUI(QWidget):
         col_err = self._colors["err"]
         col_mut = self._colors["mut"]
         col_caret = self._colors["caret"]
+        col_ghost = self._colors["ghost"]
         word_bg = self._colors["word_bg"]
         err_ul = self._colors["err_ul"]
 
-        w_start = self._find_word_start(tgt, caret)
-        w_end = self._find_word_end(tgt, caret)
+        w_start = prof.word_start(caret)
+        w_end = prof.word_end(caret)
         w_start_rel = max(0, w_start - start)
         w_end_rel = max(0, min(w_end - start, len(display)))
 
@@ -372,12 +542,15 @@ class TestUI(QWidget):
             style = ";".join(style_bits)
             return f'<span style="{style}">{txt}</span>'
 
+        breaks = {s - start - 1 for s in starts[first + 1:last]}
+
         for idx, ch in enumerate(display):
             global_idx = start + idx
             highlight_bg = None
             if w_start_rel <= idx < w_end_rel and idx >= typed_rel:
                 highlight_bg = word_bg
 
+            ch = " " if ch == "\n" else html.escape(ch)
             if idx < typed_rel:
                 if global_idx < len(tgt) and typed[global_idx] == tgt[global_idx]:
                     parts.append(span(ch, col_ok))
@@ -385,35 +558,42 @@ class TestUI(QWidget):
                     parts.append(span(ch, col_err, underline=False))
             else:
                 parts.append(span(ch, col_mut, bg=highlight_bg))
-
-        caret_html = f'<span style="color:{col_caret}">|</span>'
-        parts.insert(max(0, min(typed_rel, len(parts))), caret_html)
-
-        self.lblLine.setText("".join(parts))
+            if idx in breaks:
+                parts[-1] += "<br>"
+
+        markers = [(max(0, min(typed_rel, len(parts))), f'<span style="color:{col_caret}">|</span>')]
+        for gpos in self._other_carets():
+            g_rel = gpos - start
+            if 0 <= g_rel <= len(display) and gpos != caret:
+                markers.append((g_rel, f'<span style="color:{col_ghost}">|</span>'))
+        # insert right-to-left so earlier indices stay valid
+        for idx, marker in sorted(markers, key=lambda m: m[0], reverse=True):
+            parts.insert(idx, marker)
+
+        # lines are already broken; pre keeps the label from re-wrapping them
+        self.lblLine.setText('<div style="white-space:pre">' + "".join(parts) + "</div>")
+        tracing.event(tracing.RENDER, perf_counter_ns() - t0)
 
         if self._running and len(self.engine.typed) >= len(self.engine.target):
             self.finish_test()
 
-    def _find_word_start(self, text: str, pos: int) -> int:
-        i = max(0, min(pos, len(text)))
-        while i > 0 and not text[i - 1].isspace():
-            i -= 1
-        return i
-
-    def _find_word_end(self, text: str, pos: int) -> int:
-        i = max(0, min(pos, len(text)))
-        n = len(text)
-        while i < n and not text[i].isspace():
-            i += 1
-        return i
-
-    def _snap_to_prev_space(self, text: str, start: int, limit: int = 40) -> int:
-        i = max(0, min(start, len(text)))
-        walked = 0
-        while i > 0 and walked < limit and not text[i - 1].isspace():
-            i -= 1
-            walked += 1
-        return i
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        screen = self.screen()
+        if screen is not None and screen.refreshRate() > 0:
+            self._spark_tick.setInterval(max(1, int(1000 / screen.refreshRate())))
+
+    def _wrap_width(self) -> float:
+        """Usable label width, leaving room for the caret glyphs we insert."""
+        self.lblLine.ensurePolished()
+        width = max(self.lblLine.minimumWidth(), self.lblLine.contentsRect().width())
+        carets = 1 + len(self._ghost_positions) + len(self._opponent_positions)
+        return width - carets * QFontMetricsF(self.lblLine.font()).horizontalAdvance("|")
+
+    def resizeEvent(self, ev):
+        super().resizeEvent(ev)
+        if not self._is_code_mode:
+            self._render_line()
 
     def keyPressEvent(self, ev):
         """Handle ALL keyboard input including shift+keys."""
@@ -438,6 +618,7 @@ class TestUI(QWidget):
         
         if nk is None:
             return super().keyPressEvent(ev)
+        tracing.event(tracing.KEY, BACKSPACE if nk == "<BACKSPACE>" else ord(nk[0]))
 
         if not self._running and self._autostart:
             self.firstKey.emit(nk)
@@ -451,14 +632,22 @@ class TestUI(QWidget):
             self.resume_test()
 
         if nk == "<BACKSPACE>":
+            if self.engine.typed:
+                self._record_key(nk)
+                if self.sound is not None:
+                    self.sound.key()
+            self.weak.break_sequence()
             self._backspace()
             ev.accept()
             return
 
+        latency_ms, expected = self._record_key(nk)
         before = self.engine.stats.correct_chars
         self.engine.process_key(nk)
         correct_now = self.engine.stats.correct_chars > before
-        self.weak.note(nk, correct_now)
+        if self.sound is not None:
+            self.sound.key(correct_now)
+        self.weak.note(nk, correct_now, latency_ms, expected)
         self._render_line()
 
         if len(self.engine.typed) >= len(self.engine.target):
@@ -469,20 +658,9 @@ class TestUI(QWidget):
     def _backspace(self):
         if not self.engine.typed:
             return
-        self.engine.typed = self.engine.typed[:-1]
-        self._recount_stats()
+        self.engine.backspace()
         self._render_line()
 
-    def _recount_stats(self):
-        t, target = self.engine.typed, self.engine.target
-        self.engine.stats.keystrokes = len(t)
-        self.engine.stats.correct_chars = sum(
-            1 for j, ch in enumerate(t) if j < len(target) and target[j] == ch
-        )
-        self.engine.stats.errors = (
-            self.engine.stats.keystrokes - self.engine.stats.correct_chars
-        )
-
     @staticmethod
     def _hex_to_rgba(hex_color: str, alpha: float) -> str:
         h = hex_color.lstrip("#")
@@ -498,9 +676,12 @@ class TestUI(QWidget):
             self.timer.stop()
         except Exception:
             pass
+        self._stop_ghosts()
         self._running = False
         self._time_limit = None
+        self._ghost_mode = False
         self.engine.reset()
+        self.recorder.reset()
         if new_text is not None:
             self.engine.set_text(new_text or "")
             self.current_text = new_text or ""
@@ -508,9 +689,8 @@ class TestUI(QWidget):
             self.engine.set_text(self.current_text or "")
         self._active_seconds = 0.0
         self._paused = False
-        self._wpm_time.clear()
-        self._wpm_vals.clear()
-        self._win_start = 0
+        self._wpm_series.clear()
+        self._spark.clear()
         self.lblTimer.setText("0.0 s")
         self.lblWPM.setText("0.0 WPM")
         self.lblAcc.setText("0.0 %")
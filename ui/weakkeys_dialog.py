@@ -5,26 +5,30 @@ from PySide6.QtWidgets import (
     QLabel,
     QSpinBox,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
-    QFileDialog,
+    QTableView,
     QAbstractItemView,   # <-- Added import
+    QTabWidget,
 )
-from PySide6.QtCore import Qt
-import csv
+from PySide6.QtCore import Qt, Signal
+import numpy as np
 import pyqtgraph as pg
 
+from ui.widgets.export_progress import start_export
+from ui.widgets.array_table import ArrayTableModel, fmt_int, fmt_keys, fmt_ms, fmt_pct
+
 
 class WeakKeysDialog(QDialog):
-    def __init__(self, weak_keys_ranked, parent=None):
+    drillRequested = Signal()
+
+    def __init__(self, parent=None):
         """
-        weak_keys_ranked: iterable of tuples (key, miss_rate_float_0to1, hits, misses)
+        Built once and reused; call set_data() before each exec().
         """
         super().__init__(parent)
         self.setWindowTitle("Weak Keys")
-        self.resize(680, 520)
-        self._raw = list(weak_keys_ranked)
-        self._filtered = self._raw[:]
+        self.resize(760, 560)
+        self._attempts = np.empty(0, dtype=np.int64)
+        self._digraph_count = np.empty(0, dtype=np.int64)
 
         root = QVBoxLayout(self)
 
@@ -37,7 +41,10 @@ class WeakKeysDialog(QDialog):
         self.min_attempts.valueChanged.connect(self._apply_filter)
         ctrl.addWidget(self.min_attempts)
         ctrl.addStretch(1)
-        self.btn_export = QPushButton("Export CSV…")
+        self.btn_drill = QPushButton("Practice weak keys")
+        self.btn_drill.clicked.connect(self._request_drill)
+        ctrl.addWidget(self.btn_drill)
+        self.btn_export = QPushButton("Export…")
         self.btn_export.clicked.connect(self._export_csv)
         ctrl.addWidget(self.btn_export)
         root.addLayout(ctrl)
@@ -58,31 +65,103 @@ class WeakKeysDialog(QDialog):
         self.plot.addItem(self._bar)
         self._last_keys = None
 
-        # --- table ---
-        self.table = QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["Key", "Miss %", "Hits", "Misses"])
-        self.table.horizontalHeader().setStretchLastSection(True)
-
+        # --- tables (model/view over NumPy columns) ---
+        self.key_model = ArrayTableModel(
+            ["Key", "Miss %", "Hits", "Misses", "Median ms", "P90 ms"],
+            [str, fmt_pct, fmt_int, fmt_int, fmt_ms, fmt_ms],
+            self,
+        )
+        self.digraph_model = ArrayTableModel(
+            ["Digraph", "Count", "Median ms", "P90 ms", "Error %"],
+            [fmt_keys, fmt_int, fmt_ms, fmt_ms, fmt_pct],
+            self,
+        )
+        self.ngram_model = ArrayTableModel(
+            ["N-gram", "Count", "Mean ms", "Error %"],
+            [fmt_keys, fmt_int, fmt_ms, fmt_pct],
+            self,
+        )
+        # default order: worst miss rate / slowest digraph first; n-grams
+        # keep the miner's ranking until a header is clicked
+        self.table = self._make_view(self.key_model, 1)
+        self.digraph_table = self._make_view(self.digraph_model, 2)
+        self.ngram_table = self._make_view(self.ngram_model, -1)
+
+        tabs = QTabWidget(self)
+        tabs.addTab(self.table, "Keys")
+        tabs.addTab(self.digraph_table, "Digraphs")
+        tabs.addTab(self.ngram_table, "All-time n-grams")
+        root.addWidget(tabs, stretch=1)
+
+    def _make_view(self, model, sort_column):
+        view = QTableView(self)
+        view.setModel(model)
+        view.horizontalHeader().setStretchLastSection(True)
         # 🔒 Make table completely uneditable
-        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-
-        root.addWidget(self.table, stretch=1)
-
-        self._render()
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 6)
+        view.horizontalHeader().setSortIndicator(sort_column, Qt.DescendingOrder)
+        view.setSortingEnabled(True)
+        return view
+
+    def set_data(self, weak_keys_ranked, timing=None, ngrams=None):
+        """
+        weak_keys_ranked: iterable of tuples (key, miss_rate_float_0to1, hits, misses)
+        timing: optional typecore.keytiming.TimingReport for the last session
+        ngrams: optional all-time worst n-grams (ngram, score, count, mean_ms, error_rate)
+        """
+        raw = list(weak_keys_ranked)
+        keys = np.array([r[0] for r in raw], dtype=object)
+        rates = np.array([r[1] for r in raw], dtype=np.float64)
+        hits = np.array([r[2] for r in raw], dtype=np.int64)
+        misses = np.array([r[3] for r in raw], dtype=np.int64)
+        self._attempts = hits + misses
+
+        # join per-key latency from the last session; NaN where not timed
+        med = np.full(len(raw), np.nan)
+        p90 = np.full(len(raw), np.nan)
+        if timing is not None and len(timing.keys) and len(raw):
+            t = timing.keys
+            order = np.argsort(t.labels)
+            pos = np.searchsorted(t.labels[order], keys).clip(0, len(t) - 1)
+            hit = t.labels[order][pos] == keys
+            med[hit] = t.median_ms[order][pos][hit]
+            p90[hit] = t.p90_ms[order][pos][hit]
+        self.key_model.set_columns([keys, rates, hits, misses, med, p90])
+
+        if timing is not None:
+            d = timing.digraphs
+            self._digraph_count = d.count
+            self.digraph_model.set_columns([d.labels, d.count, d.median_ms, d.p90_ms, d.error_rate])
+        else:
+            self._digraph_count = np.empty(0, dtype=np.int64)
+            self.digraph_model.set_columns([np.empty(0, dtype=object)] + [np.empty(0)] * 4)
+
+        # All-time worst n-grams (already ranked by the miner)
+        grams = list(ngrams or [])
+        self.ngram_model.set_columns([
+            np.array([g[0] for g in grams], dtype=object),
+            np.array([g[2] for g in grams], dtype=np.int64),
+            np.array([g[3] for g in grams], dtype=np.float64),
+            np.array([g[4] for g in grams], dtype=np.float64),
+        ])
+        self._apply_filter()
 
     def _apply_filter(self):
         min_att = self.min_attempts.value()
-        self._filtered = [r for r in self._raw if (r[2] + r[3]) >= min_att]
+        self.key_model.set_mask(self._attempts >= min_att)
+        # Digraphs use the same min-attempts threshold
+        self.digraph_model.set_mask(self._digraph_count >= min_att)
         self._render()
 
     def _render(self):
-        # Build data arrays
-        keys = [r[0] for r in self._filtered]
-        rates = [int(round(r[1] * 100)) for r in self._filtered]
-        x = list(range(len(keys)))
+        rows = self.key_model.visible_rows()
+        keys = self.key_model.column(0)[rows].tolist()
+        rates = np.rint(self.key_model.column(1)[rows] * 100)
 
         # Reuse the existing bar item instead of clearing/recreating
-        self._bar.setOpts(x=x, height=rates, width=0.8)
+        self._bar.setOpts(x=np.arange(len(keys)), height=rates, width=0.8)
 
         # Only rebuild bottom tick labels if the key set changed
         if keys != self._last_keys:
@@ -91,22 +170,23 @@ class WeakKeysDialog(QDialog):
 
         self.plot.setLabel("left", "Miss %")
 
-        # Update table
-        self.table.setRowCount(len(self._filtered))
-        for i, (k, mr, hits, miss) in enumerate(self._filtered):
-            self.table.setItem(i, 0, QTableWidgetItem(k))
-            self.table.setItem(i, 1, QTableWidgetItem(f"{mr*100:.0f}%"))
-            self.table.setItem(i, 2, QTableWidgetItem(str(hits)))
-            self.table.setItem(i, 3, QTableWidgetItem(str(miss)))
+    def _request_drill(self):
+        self.drillRequested.emit()
+        self.accept()
 
     def _export_csv(self):
-        path, _ = QFileDialog.getSaveFileName(
-            self, "Export Weak Keys", "weak_keys.csv", "CSV (*.csv)"
+        # snapshot the visible rows; set_data() swaps columns, never mutates them
+        m = self.key_model
+        cols = [m.column(i) for i in range(6)]
+        rows = m.visible_rows()
+
+        def make_rows():
+            for r in rows:
+                k, mr, hits, miss, med, p90 = (c[r] for c in cols)
+                yield [k, f"{mr*100:.0f}", int(hits), int(miss), fmt_ms(med), fmt_ms(p90)]
+
+        start_export(
+            self, "Export Weak Keys", "weak_keys.csv", make_rows,
+            ["Key", "Miss-Percent", "Hits", "Misses", "Median-ms", "P90-ms"],
+            total=len(rows),
         )
-        if not path:
-            return
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["Key", "Miss-Percent", "Hits", "Misses"])
-            for k, mr, hits, miss in self._filtered:
-                w.writerow([k, f"{mr*100:.0f}", hits, miss])
@@ -0,0 +1,123 @@
+# ui/widgets/array_table.py
+"""
+Read-only table model over NumPy columns.
+
+Rows are never copied into Qt items: the view asks for the cells it paints
+and the model formats just those. Filtering is a boolean mask and sorting
+an argsort, so re-filtering thousands of rows is a couple of array ops and
+one model reset.
+"""
+from __future__ import annotations
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+Formatter = Callable[[object], str]
+
+
+class ArrayTableModel(QAbstractTableModel):
+    def __init__(self, headers: Sequence[str], formats: Sequence[Formatter] | None = None, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._formats = list(formats) if formats is not None else [str] * len(self._headers)
+        self._cols = [np.empty(0) for _ in self._headers]
+        self._mask: Optional[np.ndarray] = None
+        self._sort_col = -1
+        self._sort_desc = False
+        self._order = np.empty(0, dtype=np.int64)   # all rows, sorted
+        self._rows = np.empty(0, dtype=np.int64)    # visible rows, sorted
+
+    # ---- data in ----
+    def set_columns(self, columns: Sequence[np.ndarray]):
+        """Replace all data; keeps the current sort, clears the mask."""
+        if len(columns) != len(self._headers):
+            raise ValueError("one column per header expected")
+        self.beginResetModel()
+        self._cols = [np.asarray(c) for c in columns]
+        self._mask = None
+        self._order = self._sorted_order()
+        self._rows = self._order
+        self.endResetModel()
+
+    def set_mask(self, mask: Optional[np.ndarray]):
+        """Show only rows where mask is True (None shows everything)."""
+        self.beginResetModel()
+        self._mask = mask
+        self._rows = self._order if mask is None else self._order[mask[self._order]]
+        self.endResetModel()
+
+    def column(self, i: int) -> np.ndarray:
+        return self._cols[i]
+
+    def visible_rows(self) -> np.ndarray:
+        """Indices into the columns, in display order."""
+        return self._rows
+
+    def _sorted_order(self) -> np.ndarray:
+        n = len(self._cols[0]) if self._cols else 0
+        if self._sort_col < 0 or n == 0:
+            return np.arange(n)
+        col = self._cols[self._sort_col]
+        if not self._sort_desc:
+            return np.argsort(col, kind="stable")
+        # sort the reversed column and map back, so equal values keep their
+        # original relative order instead of coming out reversed
+        return (n - 1 - np.argsort(col[::-1], kind="stable"))[::-1]
+
+    # ---- QAbstractTableModel ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        value = self._cols[index.column()][self._rows[index.row()]]
+        return self._formats[index.column()](value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        # remember which data row each persistent index (selection, current
+        # item) points at, so it follows that row to its new position
+        old = self.persistentIndexList()
+        held = [int(self._rows[i.row()]) for i in old]
+        self._sort_col = column
+        self._sort_desc = order == Qt.DescendingOrder
+        self._order = self._sorted_order()
+        mask = self._mask
+        self._rows = self._order if mask is None else self._order[mask[self._order]]
+        if old:
+            pos = np.empty(len(self._order), dtype=np.int64)
+            pos[self._rows] = np.arange(len(self._rows))
+            self.changePersistentIndexList(
+                old, [self.index(int(pos[r]), i.column()) for r, i in zip(held, old)]
+            )
+        self.layoutChanged.emit()
+
+
+def fmt_int(v) -> str:
+    return str(int(v))
+
+
+def fmt_ms(v) -> str:
+    """Whole milliseconds; blank for NaN (no timing data)."""
+    return "" if v != v else f"{v:.0f}"
+
+
+def fmt_pct(v) -> str:
+    return f"{v * 100:.0f}%"
+
+
+def fmt_keys(v) -> str:
+    """Make whitespace inside a key / n-gram visible."""
+    return str(v).replace(" ", "␣").replace("\n", "⏎")
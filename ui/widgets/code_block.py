@@ -1,7 +1,18 @@
-from PySide6.QtWidgets import QPlainTextEdit, QTextEdit
-from PySide6.QtGui import QFont, QTextCharFormat, QColor, QTextCursor, QPainter
+import re
+
+import numpy as np
+from PySide6.QtWidgets import QPlainTextEdit
+from PySide6.QtGui import QFont, QTextCharFormat, QColor, QTextCursor, QPainter, QTextLayout
 from PySide6.QtCore import Qt, QRect, QTimer, Signal
 
+from ui.mono_layout import MonoLayout, advance_for, tab_stop_distance
+
+# per-char typing state, one byte each
+_UNTYPED, _CORRECT, _ERROR = 0, 1, 2
+# untyped chars inside a token show as _SYNTAX + token class (typecore/lexer.py)
+_SYNTAX = 2
+_RUNS = re.compile(rb"(.)\1*", re.S)
+
 
 class CodeBlock(QPlainTextEdit):
     """Monospace code display with color feedback and visible caret."""
@@ -27,18 +38,35 @@ class CodeBlock(QPlainTextEdit):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
 
-        metrics = self.fontMetrics()
-        self.setTabStopDistance(4 * metrics.horizontalAdvance(" "))
+        # caret / ghost positions are column arithmetic when the font is
+        # really fixed-pitch; tab stops use the same (fractional) advance
+        self._advance = advance_for(self.font())
+        self._layout: MonoLayout | None = None
+        self.setTabStopDistance(tab_stop_distance(self._advance or self.fontMetrics().horizontalAdvance(" ")))
 
         self._caret_pos = 0
         self._caret_visible = True
         self._typed = ""
         self._target = ""
+        # typing state per target char (_UNTYPED / _CORRECT / _ERROR)
+        self._state = bytearray()
+        # (first, last) block numbers last coloured, and the colour codes
+        # each coloured block's layout currently holds
+        self._painted_range = None
+        self._applied: dict[int, bytes] = {}
+        self._format_cache = None
+        # token class per target char from the background lexer (None until it lands)
+        self._classes: bytes | None = None
+        self.updateRequest.connect(self._on_update_request)
 
         self._color_correct = QColor("#22c55e")
         self._color_error = QColor("#ef4444")
         self._color_untyped = QColor("#9aa1a9")
         self._caret_color = QColor("#eab308")
+        self._ghost_color = QColor(154, 161, 169, 200)
+        self._ghost_positions: list[int] = []
+        self._syntax_accent = QColor("#eab308")
+        self._syntax_text = QColor("#e6e6e6")
 
         self.setStyleSheet("""
             QPlainTextEdit {
@@ -61,8 +89,12 @@ class CodeBlock(QPlainTextEdit):
 
     def set_code(self, code: str):
         self.setPlainText(code)
+        self._layout = MonoLayout(code) if self._advance else None
         self._target = code
         self._typed = ""
+        self._state = bytearray(len(code))
+        self._classes = None
+        self._applied.clear()
         self._caret_pos = 0
         self._caret_visible = True
         self._blink_state = True
@@ -71,45 +103,151 @@ class CodeBlock(QPlainTextEdit):
 
     def set_typing_state(self, typed: str, target: str):
         """Update typing state for color feedback."""
-        self._typed = typed
-        self._target = target
+        if target is not self._target and target != self._target:
+            self._target = target
+            self._state = bytearray(len(target))
+            self._classes = None
+            self._applied.clear()
+            self._typed = ""
+        self._update_state(typed)
         self._caret_pos = len(typed)
         self._caret_visible = True
         self._blink_state = True
         self._apply_colors()
         self.viewport().update()
 
-    def _apply_colors(self):
-        """Color characters based on correctness - NO UNDERLINES."""
-        selections = []
-        typed_len = len(self._typed)
-        target_len = len(self._target)
+    def _update_state(self, typed: str):
+        """Bring the per-char state up to `typed`, touching only what changed."""
+        old, target, state = self._typed, self._target, self._state
+        n = len(state)
+        if len(typed) >= len(old) and typed.startswith(old):
+            # typed on: only the new chars need a compare
+            for i in range(len(old), min(len(typed), n)):
+                state[i] = _CORRECT if typed[i] == target[i] else _ERROR
+        elif len(typed) < len(old) and old.startswith(typed):
+            # backspaced: the tail goes back to untyped
+            lo, hi = min(len(typed), n), min(len(old), n)
+            state[lo:hi] = bytes(hi - lo)
+        else:
+            m = min(len(typed), n)
+            state[:] = bytes(n)
+            for i in range(m):
+                state[i] = _CORRECT if typed[i] == target[i] else _ERROR
+        self._typed = typed
+        self._painted_range = None
+
+    def _visible_blocks(self):
+        """Blocks intersecting the viewport, top to bottom."""
+        block = self.firstVisibleBlock()
+        offset = self.contentOffset()
+        top = self.blockBoundingGeometry(block).translated(offset).top()
+        bottom = self.viewport().height()
+        while block.isValid() and top <= bottom:
+            yield block
+            top += self.blockBoundingRect(block).height()
+            block = block.next()
+
+    def set_tokens(self, tokens):
+        """Overlay syntax classes (typecore.lexer.Tokens) on the untyped code."""
+        classes = getattr(tokens, "classes", None)
+        self._classes = classes if classes is not None and len(classes) == len(self._state) else None
+        self._applied.clear()
+        self._apply_colors()
+
+    def set_syntax_colors(self, accent: str, text: str):
+        self._syntax_accent = QColor(accent)
+        self._syntax_text = QColor(text)
+        self._format_cache = None
+        self._applied.clear()
+        self._apply_colors()
 
-        for i in range(target_len):
-            cursor = QTextCursor(self.document())
-            cursor.setPosition(i)
-            cursor.setPosition(i + 1, QTextCursor.KeepAnchor)
+    def _formats(self) -> list:
+        """Char formats indexed by the codes _block_codes() produces."""
+        if self._format_cache is not None:
+            return self._format_cache
 
+        def tint(base, alpha):
+            c = QColor(base)
+            c.setAlpha(alpha)
+            return c
+
+        colors = [
+            self._color_untyped, self._color_correct, self._color_error,
+            tint(self._syntax_accent, 215),     # keyword
+            tint(self._syntax_text, 175),       # string
+            tint(self._color_untyped, 120),     # comment
+            tint(self._syntax_accent, 160),     # number
+        ]
+        self._format_cache = []
+        for code, color in enumerate(colors):
             fmt = QTextCharFormat()
             fmt.setUnderlineStyle(QTextCharFormat.NoUnderline)
+            fmt.setForeground(color)
+            if code == _SYNTAX + 3:
+                fmt.setFontItalic(True)
+            self._format_cache.append(fmt)
+        return self._format_cache
+
+    def _block_codes(self, start: int, end: int) -> bytes:
+        """Colour code per char in [start, end): typing state, or token class where untyped."""
+        state = self._state[start:end]
+        if self._classes is None:
+            return bytes(state)
+        st = np.frombuffer(state, dtype=np.uint8)
+        cl = np.frombuffer(self._classes, dtype=np.uint8, count=end - start, offset=start)
+        return np.where((st == _UNTYPED) & (cl != 0), cl + _SYNTAX, st).astype(np.uint8).tobytes()
 
-            if i < typed_len:
-                if self._typed[i] == self._target[i]:
-                    fmt.setForeground(self._color_correct)
-                else:
-                    fmt.setForeground(self._color_error)
-            else:
-                fmt.setForeground(self._color_untyped)
+    def _apply_colors(self):
+        """Color the visible characters by correctness - NO UNDERLINES.
 
-            selection = QTextEdit.ExtraSelection()
-            selection.cursor = cursor
-            selection.format = fmt
-            selections.append(selection)
+        Colours go into the layouts of the blocks in the viewport, the way
+        QSyntaxHighlighter does it, as one format range per run of equal
+        colour (typing state, or the token colour on untyped code). Extra
+        selections are not used: adjacent ones on a line are not all
+        drawn. A block is re-laid out only when its colours changed, so a
+        keystroke touches the caret's block. Scrolling re-applies them
+        through updateRequest.
+        """
+        formats = self._formats()
+        doc = self.document()
+        n = len(self._state)
+        blocks = list(self._visible_blocks())
+        for block in blocks:
+            start = block.position()
+            end = min(start + block.length() - 1, n)
+            codes = self._block_codes(start, end) if end > start else b""
+            number = block.blockNumber()
+            if self._applied.get(number) == codes:
+                continue
+            self._applied[number] = codes
+            ranges = []
+            for m in _RUNS.finditer(codes):
+                fr = QTextLayout.FormatRange()
+                fr.start = m.start()
+                fr.length = m.end() - m.start()
+                fr.format = formats[codes[m.start()]]
+                ranges.append(fr)
+            block.layout().setFormats(ranges)
+            doc.markContentsDirty(start, block.length())
+        if blocks:
+            self._painted_range = (blocks[0].blockNumber(), blocks[-1].blockNumber())
 
-        self.setExtraSelections(selections)
+    def _on_update_request(self, rect, dy):
+        # fires for every repaint; only a change of visible blocks needs colouring
+        if not self._state:
+            return
+        first = self.firstVisibleBlock().blockNumber()
+        if self._painted_range is None or self._painted_range[0] != first or dy:
+            self._apply_colors()
+            return
+        last = first
+        for block in self._visible_blocks():
+            last = block.blockNumber()
+        if last != self._painted_range[1]:
+            self._apply_colors()
 
     def set_caret(self, pos: int, visible: bool = True):
-        self._caret_pos = max(0, min(pos, len(self.toPlainText())))
+        self._caret_pos = max(0, min(pos, len(self._target)))
         self._caret_visible = visible
         self._blink_state = True
 
@@ -123,23 +261,56 @@ class CodeBlock(QPlainTextEdit):
         self._caret_visible = False
         self.viewport().update()
 
-    def set_theme_colors(self, correct: str, error: str, untyped: str, caret: str):
+    def set_ghost_carets(self, positions):
+        """Character offsets of ghost racers, painted as secondary carets."""
+        positions = list(positions)
+        if positions != self._ghost_positions:
+            self._ghost_positions = positions
+            self.viewport().update()
+
+    def set_theme_colors(self, correct: str, error: str, untyped: str, caret: str, ghost: str | None = None):
         self._color_correct = QColor(correct)
         self._color_error = QColor(error)
         self._color_untyped = QColor(untyped)
+        self._format_cache = None
+        self._applied.clear()
         self._caret_color = QColor(caret)
+        if ghost:
+            self._ghost_color = QColor(ghost)
+            self._ghost_color.setAlpha(200)
         self._apply_colors()
 
+    def _caret_rect(self, pos: int, width: int) -> QRect:
+        pos = max(0, min(pos, len(self._target)))
+        if self._layout is None:
+            rect = self.cursorRect(self._cursor_at(pos))
+            return QRect(rect.x(), rect.y(), width, rect.height())
+        # no wrapping: block n is line n, and every block is one line tall
+        line, col = self._layout.line_col(pos)
+        first = self.firstVisibleBlock()
+        top = self.blockBoundingGeometry(first).translated(self.contentOffset())
+        h = top.height()
+        x = self.contentOffset().x() + self.document().documentMargin() + col * self._advance
+        y = top.top() + (line - first.blockNumber()) * h
+        return QRect(round(x), round(y), width, round(h))
+
+    def _cursor_at(self, pos: int) -> QTextCursor:
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(pos)
+        return cursor
+
     def paintEvent(self, event):
         super().paintEvent(event)
 
+        if self._ghost_positions:
+            painter = QPainter(self.viewport())
+            for pos in self._ghost_positions:
+                painter.fillRect(self._caret_rect(pos, 2), self._ghost_color)
+            painter.end()
+
         if self._caret_visible and self._blink_state:
             painter = QPainter(self.viewport())
-            cursor = QTextCursor(self.document())
-            cursor.setPosition(self._caret_pos)
-            rect = self.cursorRect(cursor)
-            caret_rect = QRect(rect.x(), rect.y(), 3, rect.height())
-            painter.fillRect(caret_rect, self._caret_color)
+            painter.fillRect(self._caret_rect(self._caret_pos, 3), self._caret_color)
             painter.end()
 
     def keyPressEvent(self, event):
@@ -0,0 +1,70 @@
+# ui/widgets/export_progress.py
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+
+from core.threads import ExportWorker, Workers
+from utils.export import FILE_FILTER
+
+# filter label -> suffix appended when the user typed a bare file name
+_SUFFIXES = {
+    "Gzipped CSV": ".csv.gz",
+    "Gzipped JSON Lines": ".jsonl.gz",
+    "JSON Lines": ".jsonl",
+    "CSV": ".csv",
+}
+
+# running workers; held here so their signal objects outlive this call
+_active = set()
+
+
+def start_export(parent, title: str, default_name: str, make_rows, header, total: int = 0):
+    """
+    Ask for a file and stream `make_rows()` into it on the thread pool.
+    Shows a non-modal progress dialog with Cancel; returns the worker, or
+    None if the user did not pick a file.
+    """
+    path, selected = QFileDialog.getSaveFileName(parent, title, default_name, FILE_FILTER)
+    if not path:
+        return None
+    if not path.lower().endswith((".csv", ".jsonl", ".csv.gz", ".jsonl.gz")):
+        label = next((k for k in _SUFFIXES if selected.startswith(k)), "CSV")
+        path += _SUFFIXES[label]
+
+    progress = QProgressDialog(f"Exporting to {path}…", "Cancel", 0, max(0, total), parent)
+    progress.setWindowTitle(title)
+    progress.setMinimumDuration(300)
+    progress.setAutoClose(False)
+    progress.setAutoReset(False)
+
+    worker = ExportWorker(make_rows, header, path)
+    sig = worker.signals
+
+    def on_progress(n):
+        if total:
+            progress.setValue(min(n, total))
+        progress.setLabelText(f"Exported {n:,} rows…")
+
+    def finish():
+        _active.discard(worker)
+        progress.close()
+        progress.deleteLater()
+
+    def on_done(n, out):
+        finish()
+        QMessageBox.information(parent, title, f"Exported {n:,} rows to {out}")
+
+    def on_cancelled():
+        finish()
+
+    def on_failed(msg):
+        finish()
+        QMessageBox.warning(parent, title, msg)
+
+    sig.progress.connect(on_progress)
+    sig.done.connect(on_done)
+    sig.cancelled.connect(on_cancelled)
+    sig.failed.connect(on_failed)
+    progress.canceled.connect(worker.cancel)
+
+    _active.add(worker)
+    Workers.pool.start(worker)
+    return worker
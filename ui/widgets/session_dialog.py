@@ -1,14 +1,14 @@
 # ui/widgets/session_dialog.py
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QComboBox
+    QLabel, QPushButton, QComboBox, QCheckBox
 )
 
 class SessionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("New Session")
-        self.setFixedSize(340, 210)
+        self.setFixedSize(340, 250)
 
         layout = QVBoxLayout(self)
         layout.setSpacing(14)
@@ -28,9 +28,14 @@ class SessionDialog(QDialog):
             "Code Snippets",
             "Numbers",
             "Punctuation",
+            "Weak Keys Drill",
         ])
         layout.addWidget(self.cmb_source)
 
+        # Ghost racer
+        self.chk_ghost = QCheckBox("Race ghost of personal best", self)
+        layout.addWidget(self.chk_ghost)
+
         # Buttons
         row = QHBoxLayout()
         btn_start = QPushButton("Start", self)
@@ -49,4 +54,5 @@ class SessionDialog(QDialog):
             "time_limit": None if self.cmb_time.currentText() == "Unlimited"
                           else int(self.cmb_time.currentText()),
             "source": self.cmb_source.currentText(),
+            "ghost": self.chk_ghost.isChecked(),
         }
@@ -3,30 +3,13 @@ from PySide6.QtGui import QPainter, QFont, QColor, QPen, QPaintEvent
 from PySide6.QtCore import Qt, QTimer, QRectF, QPointF
 from PySide6.QtGui import QFontMetricsF
 
+from typecore.text_profile import profile_for
+
+
 def _pick(theme, attr, default):
     return getattr(theme, attr, default)
 
 
-def _looks_like_code(text: str) -> bool:
-    """
-    Same heuristic as TestUI: determines whether the target_text should be rendered
-    in monospace / code mode. This lets TypingArea switch fonts for layout/painting.
-    """
-    if not text:
-        return False
-    lines = text.splitlines()
-    for ln in lines:
-        if ln.startswith("\t") or ln.startswith("    "):
-            return True
-        stripped = ln.lstrip()
-        if stripped.startswith(("def ", "class ", "function ", "import ", "from ")) or "{" in ln or "}" in ln or "=> " in ln:
-            if len(lines) > 1:
-                return True
-    indent_count = sum(1 for ln in lines if len(ln) - len(ln.lstrip()) >= 2)
-    if len(lines) >= 3 and indent_count >= max(1, len(lines) // 6):
-        return True
-    return False
-
 
 class TypingArea(QWidget):
     """
@@ -71,6 +54,7 @@ class TypingArea(QWidget):
         self._word_char_ranges: list[tuple[int,int]] = []  # (char_start, char_end_exclusive)
         self._char_to_word: list[int] = []  # index->word index
         self._lines: list[list[int]] = []  # line -> list of word indices
+        self._word_line: list[int] = []  # word index -> line index
 
         # animation offsets
         self._offset_y = 0.0
@@ -99,30 +83,16 @@ class TypingArea(QWidget):
         We'll treat whitespace between words as part of the following word's prefix when placing.
         Returns list of tuples: (word_text, start_index, end_index)
         """
+        prof = profile_for(text)
         words = []
-        i = 0
-        n = len(text)
-        while i < n:
-            # skip leading spaces/newlines and keep them attached to next non-space chunk
-            ws_start = i
-            while i < n and text[i].isspace():
-                i += 1
-            ws = text[ws_start:i]  # could be empty
-            # now collect non-space chunk
-            chunk_start = i
-            while i < n and not text[i].isspace():
-                i += 1
-            chunk = text[chunk_start:i]
-            if chunk == "" and ws == "":
-                break
-            # If chunk is empty but there were spaces (like trailing spaces or newlines),
-            # represent them as a word of just whitespace so they get rendered (space glyphs)
-            if chunk == "" and ws != "":
-                words.append((ws, ws_start, i))
-            else:
-                # attach preceding whitespace to this chunk (so it moves with the word)
-                full = ws + chunk
-                words.append((full, ws_start, i))
+        prev_end = 0
+        for start, end in zip(prof.word_starts, prof.word_ends):
+            # attach preceding whitespace to this chunk (so it moves with the word)
+            words.append((text[prev_end:end], prev_end, end))
+            prev_end = end
+        if prev_end < len(text):
+            # trailing spaces/newlines become a whitespace-only word so they still render
+            words.append((text[prev_end:], prev_end, len(text)))
         return words
 
     def _ensure_font_for_text(self, text: str):
@@ -130,7 +100,7 @@ class TypingArea(QWidget):
         Update self._font depending on whether text looks like code.
         Must be called before creating QFontMetricsF / reflow so layout matches font.
         """
-        if _looks_like_code(text):
+        if profile_for(text).is_code:
             f = QFont(self._mono_font_family, 28)
             # prefer typewriter style hint for monospace on various platforms
             f.setStyleHint(QFont.Monospace)
@@ -239,6 +209,11 @@ class TypingArea(QWidget):
         if cur_line:
             self._lines.append(cur_line)
 
+        self._word_line = [0] * len(self._word_positions)
+        for li, line in enumerate(self._lines):
+            for w in line:
+                self._word_line[w] = li
+
     # ---------- animation ----------
     def _anim_tick(self):
         if abs(self._offset_y - self._target_offset_y) < 0.25:
@@ -263,12 +238,7 @@ class TypingArea(QWidget):
             line_idx = len(self._lines) - 1
         else:
             word_idx = self._char_to_word[char_index] if char_index < len(self._char_to_word) else 0
-            # find which line contains this word
-            line_idx = 0
-            for li, line in enumerate(self._lines):
-                if word_idx in line:
-                    line_idx = li
-                    break
+            line_idx = self._word_line[word_idx]
 
         panel_rect = self.rect().adjusted(self._pad_x, self._pad_y, -self._pad_x, -self._pad_y)
         target_line_top = panel_rect.top() + line_idx * self._line_height
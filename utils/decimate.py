@@ -0,0 +1,105 @@
+# utils/decimate.py
+"""
+Plot decimation: reduce a series to about one point per pixel before it
+reaches pyqtgraph.
+
+lttb() keeps the visual shape (Largest-Triangle-Three-Buckets) and
+minmax_envelope() keeps every peak, so a line plus a faint envelope looks
+the same as plotting every sample. merge_envelope() does the same for a
+series that is already stored as (x, min, max) buckets.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+_CACHE_SIZE = 32
+_cache: "OrderedDict[tuple, Decimated]" = OrderedDict()
+
+
+class Decimated(NamedTuple):
+    x: np.ndarray
+    y: np.ndarray
+    # (x, ymin, ymax) per pixel bucket; None when the series was already small
+    envelope: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # first and last points are kept; the rest is split into n_out - 2 buckets
+    edges = 1 + _bucket_edges(n - 2, n_out - 2)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    avg_x = np.append(avg_x, x[-1])
+    avg_y = np.append(avg_y, y[-1])
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # triangle (previous pick, candidate, next bucket's average)
+        area = np.abs(
+            (x[a] - avg_x[b + 1]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y[b + 1] - y[a])
+        )
+        a = lo + int(area.argmax())
+        idx[b + 1] = a
+    return x[idx], y[idx]
+
+
+def minmax_envelope(x, y, buckets: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n == 0:
+        return x, y, y
+    buckets = max(1, min(buckets, n))
+    starts = _bucket_edges(n, buckets)[:-1]
+    centers = np.add.reduceat(x, starts) / np.diff(np.append(starts, n))
+    return centers, np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+def merge_envelope(x, lo, hi, buckets: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """An existing (x, lo, hi) envelope merged down to at most `buckets` buckets."""
+    cx, lo, _ = minmax_envelope(x, lo, buckets)
+    _, _, hi = minmax_envelope(x, hi, buckets)
+    return cx, lo, hi
+
+
+def decimate(x, y, width: int, key: Hashable = None) -> Decimated:
+    """
+    Series reduced to ~`width` points. With a key, results are cached per
+    (key, width) so repaints and resizes back to a known width are free.
+    """
+    width = max(3, int(width))
+    if key is not None:
+        hit = _cache.get((key, width))
+        if hit is not None:
+            _cache.move_to_end((key, width))
+            return hit
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= 2 * width:
+        out = Decimated(x, y, None)
+    else:
+        lx, ly = lttb(x, y, width)
+        out = Decimated(lx, ly, minmax_envelope(x, y, width))
+
+    if key is not None:
+        _cache[(key, width)] = out
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return out
@@ -0,0 +1,98 @@
+# utils/export.py
+"""
+Streaming export of tabular rows to CSV or JSON Lines.
+
+Rows come from any iterable (e.g. storage.iter_results over a SQLite
+cursor, or trace.iter_keystrokes over mapped trace files) and are written
+as they arrive, so memory use does not depend on how many rows are
+exported. A ".gz" suffix compresses the output.
+Output goes to a temporary file that only replaces the target once the
+export finished, so a cancelled or failed export leaves nothing behind.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+import csv
+import gzip
+import json
+import os
+
+FORMATS = ("csv", "jsonl")
+FILE_FILTER = (
+    "CSV (*.csv);;JSON Lines (*.jsonl);;"
+    "Gzipped CSV (*.csv.gz);;Gzipped JSON Lines (*.jsonl.gz)"
+)
+
+# progress is reported (and cancellation checked) once per this many rows
+CHUNK_ROWS = 2000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def detect_format(path) -> str:
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    fmt = suffixes[-1].lstrip(".") if suffixes else ""
+    return fmt if fmt in FORMATS else "csv"
+
+
+def _open_text(path: Path, compress: bool):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_rows(
+    rows: Iterable[Sequence],
+    header: Sequence[str],
+    path,
+    fmt: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    """
+    Write `rows` to `path` and return the number of rows written.
+    Raises ExportCancelled if `cancelled()` turns true part-way.
+    """
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    tmp = path.with_name(path.name + ".part")
+    keys = list(header)
+    n = 0
+    try:
+        with _open_text(tmp, path.name.lower().endswith(".gz")) as f:
+            if fmt == "csv":
+                w = csv.writer(f)
+                w.writerow(keys)
+                emit = w.writerow
+            else:
+                # one encoder for the whole run; json.dumps with options builds a new one per call
+                encode = json.JSONEncoder(ensure_ascii=False).encode
+
+                def emit(row):
+                    f.write(encode(dict(zip(keys, row))))
+                    f.write("\n")
+
+            for row in rows:
+                emit(row)
+                n += 1
+                if n % CHUNK_ROWS == 0:
+                    if cancelled is not None and cancelled():
+                        raise ExportCancelled()
+                    if progress is not None:
+                        progress(n)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    if progress is not None:
+        progress(n)
+    return n
@@ -1,6 +1,8 @@
 import json, os
 from pathlib import Path
 
+from utils.sfx import ensure_effects
+
 DEFAULT_TEXT = (
     "Welcome to Typemaster — press any key to start. "
     "Type this text; correct keystrokes glow green, mistakes glow red. "
@@ -45,21 +47,8 @@ def ensure_app_files():
         with open("data/test_results.json", "w", encoding="utf-8") as f:
             json.dump([], f)
 
-    # SFX placeholders so QSoundEffect has valid targets
-    os.makedirs("assets/sfx", exist_ok=True)
-    for fn in (
-        "key_click.wav",
-        "ok.wav",
-        "err.wav",
-        "key_soft.wav",
-        "key_tock.wav",
-        "key_water.wav",
-        "key_air.wav",
-        "key_type.wav",
-    ):
-        p = os.path.join("assets/sfx", fn)
-        if not os.path.exists(p):
-            open(p, "ab").close()
+    # built-in sound effects (synthesized; user replacements are kept)
+    ensure_effects()
 
     # Styles + themes dir
     os.makedirs("assets", exist_ok=True)
@@ -1,4 +1,5 @@
 from typing import List
+import numpy as np
 import pyqtgraph as pg
 
 def setup_wpm_plot(plot_widget: pg.PlotWidget, line_color: str):
@@ -14,5 +15,43 @@ def setup_wpm_plot(plot_widget: pg.PlotWidget, line_color: str):
     return curve
 
 def update_curve(curve, y: List[float]):
-    x = list(range(len(y)))
-    curve.setData(x, y)
+    # x defaults to the sample index; no per-call list building
+    curve.setData(np.asarray(y, dtype=float))
+
+
+class LiveCurve:
+    """
+    Append-only curve for live plots. Points go into preallocated buffers and
+    flush() hands pyqtgraph views of them. When the buffers fill, every other
+    point is dropped in place, so per-update cost stays constant however long
+    the session runs.
+    """
+
+    def __init__(self, curve, capacity: int = 2048):
+        self.curve = curve
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._n = 0
+        self._dirty = False
+
+    def append(self, x: float, y: float):
+        if self._n == len(self._x):
+            half = len(self._x) // 2
+            self._x[:half] = self._x[0::2]
+            self._y[:half] = self._y[0::2]
+            self._n = half
+        self._x[self._n] = x
+        self._y[self._n] = y
+        self._n += 1
+        self._dirty = True
+
+    def clear(self):
+        self._n = 0
+        self._dirty = True
+
+    def flush(self):
+        """Push pending points to the plot (call at most once per frame)."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.curve.setData(self._x[:self._n], self._y[:self._n])
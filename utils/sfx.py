@@ -0,0 +1,115 @@
+# utils/sfx.py
+"""
+Built-in sound effects, synthesized with NumPy and written as 16-bit mono
+WAVs. Only missing or zero-length files (the old placeholders) are
+generated; any non-empty file in assets/sfx is the user's and is kept,
+whatever WAV flavour it is.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict
+import wave
+
+import numpy as np
+
+SFX_DIR = Path("assets/sfx")
+RATE = 44100
+
+# keystroke sounds the user can pick from, in menu order: file stem -> label
+KEY_SOUNDS = {
+    "key_click": "Click",
+    "key_soft": "Soft",
+    "key_tock": "Tock",
+    "key_type": "Typewriter",
+    "key_water": "Water",
+    "key_air": "Air",
+}
+EFFECTS = (*KEY_SOUNDS, "err", "ok")
+
+
+def _t(ms: float) -> np.ndarray:
+    return np.arange(int(RATE * ms / 1000.0)) / RATE
+
+
+def _env(t: np.ndarray, decay_ms: float) -> np.ndarray:
+    # exponential decay with a 1 ms fade-in so the start does not pop
+    env = np.exp(-t * 1000.0 / decay_ms)
+    ramp = min(len(t), int(RATE / 1000))
+    env[:ramp] *= np.linspace(0.0, 1.0, ramp)
+    return env
+
+
+def _noise(n: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1.0, 1.0, n)
+
+
+def _smooth(x: np.ndarray, width: int) -> np.ndarray:
+    return np.convolve(x, np.ones(width) / width, mode="same")
+
+
+def synthesize(name: str) -> np.ndarray:
+    """Float samples in [-1, 1] for one of EFFECTS."""
+    if name == "key_click":
+        t = _t(25)
+        x = 0.6 * _noise(len(t), 1) * _env(t, 2) + 0.5 * np.sin(2 * np.pi * 3500 * t) * _env(t, 6)
+    elif name == "key_soft":
+        t = _t(40)
+        x = 0.8 * _smooth(_noise(len(t), 2), 12) * _env(t, 8)
+    elif name == "key_tock":
+        t = _t(50)
+        x = 0.7 * np.sin(2 * np.pi * 900 * t) * _env(t, 12) + 0.2 * _noise(len(t), 3) * _env(t, 1.5)
+    elif name == "key_type":
+        t = _t(60)
+        x = (0.5 * _noise(len(t), 4) * _env(t, 3)
+             + 0.3 * np.sin(2 * np.pi * 2000 * t) * _env(t, 8)
+             + 0.5 * np.sin(2 * np.pi * 150 * t) * _env(t, 20))
+    elif name == "key_water":
+        t = _t(60)
+        freq = 1200.0 - 800.0 * t / t[-1]
+        x = 0.6 * np.sin(2 * np.pi * np.cumsum(freq) / RATE) * _env(t, 18)
+    elif name == "key_air":
+        t = _t(40)
+        n = _noise(len(t), 5)
+        x = 0.5 * (n - _smooth(n, 6)) * _env(t, 10)
+    elif name == "err":
+        t = _t(110)
+        x = 0.35 * np.sign(np.sin(2 * np.pi * 180 * t)) * _env(t, 45)
+    elif name == "ok":
+        t = _t(320)
+        half = len(t) // 2
+        tone = np.where(np.arange(len(t)) < half, 660.0, 990.0)
+        x = 0.45 * np.sin(2 * np.pi * np.cumsum(tone) / RATE) * _env(t, 160)
+    else:
+        raise KeyError(name)
+    return np.clip(x, -1.0, 1.0)
+
+
+def write_wav(path: Path, samples: np.ndarray):
+    pcm = (samples * 32767.0).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(pcm.tobytes())
+
+
+def _missing(path: Path) -> bool:
+    # `wave` cannot read float or WAVE_FORMAT_EXTENSIBLE files that
+    # QSoundEffect plays fine, so file contents are not judged here
+    try:
+        return path.stat().st_size == 0
+    except FileNotFoundError:
+        return True
+
+
+def ensure_effects(directory: Path = SFX_DIR) -> Dict[str, Path]:
+    """Path of every effect, generating any that is missing or empty."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name in EFFECTS:
+        p = directory / f"{name}.wav"
+        if _missing(p):
+            write_wav(p, synthesize(name))
+        paths[name] = p
+    return paths